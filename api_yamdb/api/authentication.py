@@ -0,0 +1,93 @@
+"""JWT-аутентификация по подписанным claims без запроса к БД.
+
+При выдаче токена в него записываются username, роль, is_staff,
+is_superuser и версия токена пользователя (User.token_version). Версия
+растёт при изменении любого из этих полей, и её актуальное значение
+хранится в кеше; пока версия в токене совпадает с ней, пользователь
+собирается из claims. Иначе (или если версии нет в кеше) пользователь
+читается из базы, как в обычном JWTAuthentication.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+VERSION_CLAIM = 'ver'
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+# Короткоживущий кеш версий в памяти процесса поверх общего кеша:
+# {user_id: (версия, момент устаревания)}.
+_local_versions = {}
+
+
+def version_key(user_id):
+    return f'auth-token-version:{user_id}'
+
+
+def remember_version(user):
+    cache.set(
+        version_key(user.pk), user.token_version,
+        settings.AUTH_VERSION_CACHE_TIMEOUT
+    )
+
+
+def forget_version(user_id):
+    cache.delete(version_key(user_id))
+
+
+def get_version(user_id):
+    now = time.monotonic()
+    local_version, expires = _local_versions.get(user_id, (None, 0))
+    if expires > now:
+        return local_version
+    version = cache.get(version_key(user_id))
+    if version is not None and settings.AUTH_VERSION_LOCAL_TIMEOUT:
+        _local_versions[user_id] = (
+            version, now + settings.AUTH_VERSION_LOCAL_TIMEOUT
+        )
+    return version
+
+
+def issue_access_token(user):
+    token = AccessToken.for_user(user)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        claims = (VERSION_CLAIM, *USER_CLAIMS)
+        if any(claim not in validated_token for claim in claims):
+            # Токен выдан до появления claims.
+            return super().get_user(validated_token)
+
+        version = get_version(user_id)
+        if version is None:
+            user = super().get_user(validated_token)
+            remember_version(user)
+            return user
+        if version != validated_token[VERSION_CLAIM]:
+            return super().get_user(validated_token)
+
+        user = User(
+            id=user_id,
+            is_active=True,
+            token_version=version,
+            **{claim: validated_token[claim] for claim in USER_CLAIMS}
+        )
+        user._state.adding = False
+        return user
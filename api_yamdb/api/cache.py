@@ -0,0 +1,43 @@
+"""Кеш ответов list() для редко меняющихся справочников.
+
+Ключ ответа включает «поколение» модели; при любом сохранении или
+удалении объекта поколение меняется, и все ответы по этой модели
+перестают находиться в кеше. Работает с любым бэкендом из CACHES.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def generation_key(model):
+    return f'list-generation:{model._meta.label_lower}'
+
+
+def get_generation(model):
+    key = generation_key(model)
+    generation = cache.get(key)
+    if generation is not None:
+        return generation
+    cache.add(key, uuid.uuid4().hex, None)
+    return cache.get(key)
+
+
+def invalidate(model):
+    cache.set(generation_key(model), uuid.uuid4().hex, None)
+
+
+def list_cache_key(model, path):
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return (
+        f'list:{model._meta.label_lower}:{get_generation(model)}:{digest}'
+    )
+
+
+def get_list(key):
+    return cache.get(key)
+
+
+def set_list(key, data):
+    cache.set(key, data, settings.LIST_CACHE_TIMEOUT)
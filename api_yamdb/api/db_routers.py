@@ -0,0 +1,85 @@
+"""Чтение с реплик базы данных.
+
+Безопасные запросы к представлениям API (ReplicaReadMixin) читают с
+одной из REPLICA_DATABASES, всё остальное идёт в default. После записи
+пользователь на REPLICA_PIN_SECONDS закрепляется за основной базой,
+чтобы сразу видеть свой отзыв или комментарий, несмотря на отставание
+реплик. Состояние запроса живёт в контекстной переменной, которую
+выставляет ReplicaRoutingMiddleware.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# {'replica': псевдоним реплики или None, 'wrote': была ли запись}.
+_routing = ContextVar('routing', default=None)
+
+# DatabaseCache хранит кеш в таблице: она всегда читается с основной базы.
+PRIMARY_ONLY_APPS = ('django_cache',)
+
+
+def pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_user(user_id):
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id)) is not None
+
+
+def start_request():
+    """Новое состояние маршрутизации; возвращает токен для reset."""
+    return _routing.set({'replica': None, 'wrote': False})
+
+
+def finish_request(token):
+    """Возвращает состояние запроса и восстанавливает прежнее."""
+    try:
+        return _routing.get()
+    finally:
+        _routing.reset(token)
+
+
+def read_from_replica(user):
+    """Переводит чтение текущего запроса на случайную реплику."""
+    state = _routing.get()
+    if state is None or not settings.REPLICA_DATABASES:
+        return
+    if user.is_authenticated and is_pinned(user.pk):
+        return
+    state['replica'] = random.choice(settings.REPLICA_DATABASES)
+
+
+def read_from_primary():
+    """Возвращает чтение текущего запроса на основную базу."""
+    state = _routing.get()
+    if state is not None:
+        state['replica'] = None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (state is None or state['wrote'] or state['replica'] is None
+                or model._meta.app_label in PRIMARY_ONLY_APPS):
+            return DEFAULT_DB_ALIAS
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None and model._meta.app_label not in (
+                PRIMARY_ONLY_APPS):
+            # Дальше запрос читает то, что записал, с основной базы.
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
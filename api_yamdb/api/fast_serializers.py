@@ -0,0 +1,140 @@
+"""Быстрая сериализация списков только для чтения.
+
+ValuesSerializer строит тот же JSON, что и ModelSerializer, но из
+словарей .values(): по полям сериализатора один раз вычисляются пути
+для values() и функции доступа, а на каждую строку остаётся только
+сборка словаря. Значения, которые уже имеют нужный тип (строки и числа
+из базы), не проходят через to_representation полей DRF.
+"""
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+# Поля, чьё to_representation не меняет значение из базы.
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def converted(getter, convert):
+    def get(row):
+        value = getter(row)
+        return None if value is None else convert(value)
+    return get
+
+
+def nested(fk_path, accessors):
+    fk = itemgetter(fk_path)
+
+    def get(row):
+        if fk(row) is None:
+            return None
+        return {name: accessor(row) for name, accessor in accessors}
+    return get
+
+
+class ValuesSerializer:
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = {}
+
+    def compile(self, serializer, prefix=''):
+        """Возвращает (пути values(), [(имя, функция доступа)], many)."""
+        paths, accessors, many = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = prefix + field.source.replace('.', '__')
+            if isinstance(field, (serializers.ListSerializer,
+                                  serializers.ManyRelatedField)):
+                if prefix:
+                    raise ImproperlyConfigured(
+                        f'{self.serializer_class.__name__}.{name}: вложенные '
+                        'списки второго уровня не поддерживаются'
+                    )
+                many.append((name, source, self.compile_many(field)))
+                accessors.append((name, itemgetter(name)))
+            elif isinstance(field, serializers.Serializer):
+                child_paths, child_accessors, _ = self.compile(
+                    field, f'{source}__'
+                )
+                paths += [source, *child_paths]
+                accessors.append((name, nested(source, child_accessors)))
+            elif isinstance(field, serializers.SlugRelatedField):
+                paths.append(f'{source}__{field.slug_field}')
+                accessors.append((name, itemgetter(paths[-1])))
+            elif isinstance(field, (serializers.PrimaryKeyRelatedField,
+                                    *PLAIN_FIELDS)):
+                paths.append(source)
+                accessors.append((name, itemgetter(source)))
+            elif type(field).to_representation is not (
+                    serializers.Field.to_representation):
+                paths.append(source)
+                accessors.append((name, converted(
+                    itemgetter(source), field.to_representation
+                )))
+            else:
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__}.{name}: поле '
+                    f'{type(field).__name__} не поддерживается'
+                )
+        return paths, accessors, many
+
+    def compile_many(self, field):
+        """Элемент списка — словарь вложенного сериализатора или slug."""
+        if isinstance(field, serializers.ListSerializer):
+            return self.compile(field.child)
+        relation = field.child_relation
+        if not isinstance(relation, serializers.SlugRelatedField):
+            raise ImproperlyConfigured(
+                f'{self.serializer_class.__name__}.{field.field_name}: поле '
+                f'{type(relation).__name__} не поддерживается'
+            )
+        return [relation.slug_field], None, []
+
+    def compiled(self, options):
+        """Компиляция для сериализатора с параметрами options (?fields=)."""
+        options = options or {}
+        key = tuple(sorted(options.items()))
+        if key not in self._compiled:
+            self._compiled[key] = self.compile(
+                self.serializer_class(**options)
+            )
+        return self._compiled[key]
+
+    def values(self, queryset, extra=(), options=None):
+        paths, _, _ = self.compiled(options)
+        return queryset.prefetch_related(None).values(
+            'pk', *dict.fromkeys([*paths, *extra])
+        )
+
+    def add_many(self, rows, queryset, options):
+        """Вложенные списки (M2M) — одним запросом на поле."""
+        _, _, many = self.compiled(options)
+        if not many:
+            return
+        model = queryset.model
+        pks = [row['pk'] for row in rows]
+        for name, source, (paths, accessors, _) in many:
+            field = model._meta.get_field(source)
+            related = field.related_query_name()
+            groups = {pk: [] for pk in pks}
+            for row in field.related_model.objects.filter(
+                **{f'{related}__in': pks}
+            ).order_by('pk').values(related, *paths):
+                groups[row[related]].append(
+                    row[paths[0]] if accessors is None else {
+                        child: accessor(row) for child, accessor in accessors
+                    }
+                )
+            for row in rows:
+                row[name] = groups[row['pk']]
+
+    def to_representation(self, rows, queryset, options=None):
+        _, accessors, _ = self.compiled(options)
+        rows = list(rows)
+        self.add_many(rows, queryset, options)
+        return [
+            {name: accessor(row) for name, accessor in accessors}
+            for row in rows
+        ]
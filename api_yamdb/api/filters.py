@@ -1,5 +1,7 @@
 import django_filters
-from reviews.models import Title
+from django.db import connection
+from reviews.models import Title, TitleRanking
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -10,7 +12,30 @@ class TitleFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug')
     genre = django_filters.CharFilter(field_name='genre__slug')
     year = django_filters.NumberFilter(field_name='year')
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'name', 'year', 'search')
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value, connection)
+
+
+class TitleRankingFilter(django_filters.FilterSet):
+    """Фильтры подборок лучших (titles/top/).
+
+    Без ?genre= выбираются общие строки рейтинга (без жанра).
+    """
+    category = django_filters.CharFilter(field_name='category__slug')
+    genre = django_filters.CharFilter(field_name='genre__slug')
+    year = django_filters.NumberFilter(field_name='year')
+
+    class Meta:
+        model = TitleRanking
+        fields = ('category', 'genre', 'year')
+
+    def filter_queryset(self, queryset):
+        if not self.form.cleaned_data.get('genre'):
+            queryset = queryset.filter(genre=None)
+        return super().filter_queryset(queryset)
@@ -0,0 +1,146 @@
+"""Замер времени обработки запроса: заголовок Server-Timing и лог.
+
+Замеряется только доля запросов SERVER_TIMING_SAMPLE_RATE; для
+остальных middleware стоит один вызов random(), а timed() — одно
+чтение контекстной переменной.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from . import db_routers
+
+logger = logging.getLogger('api.timing')
+
+# {метрика: [секунды, вложенность]} текущего замеряемого запроса.
+_timings = ContextVar('timings', default=None)
+
+METRICS = (
+    ('db', 'SQL'),
+    ('auth', 'Authentication'),
+    ('permissions', 'Permissions'),
+    ('serializer', 'Serializers'),
+    ('view', 'View'),
+)
+
+
+@contextmanager
+def timed(name):
+    """Добавляет время блока к метрике name текущего запроса.
+
+    Вложенные блоки с тем же именем (сериализатор внутри сериализатора)
+    не учитываются повторно.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    metric = timings.setdefault(name, [0.0, 0])
+    metric[1] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric[1] -= 1
+        if not metric[1]:
+            metric[0] += time.perf_counter() - started
+
+
+class QueryTimer:
+    """execute_wrapper: считает запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        with timed('db'):
+            return execute(sql, params, many, context)
+
+
+def server_timing(durations, queries, total):
+    entries = []
+    for name, description in METRICS:
+        if name not in durations:
+            continue
+        if name == 'db':
+            description = f'{description} ({queries})'
+        entries.append(
+            f'{name};dur={durations[name]:.1f};desc="{description}"'
+        )
+    entries.append(f'total;dur={total:.1f}')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = {}
+        token = _timings.set(timings)
+        query_timer = QueryTimer()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        total = time.perf_counter() - started
+
+        durations = {
+            name: timings[name][0] * 1000
+            for name, _ in METRICS if name in timings
+        }
+        response['Server-Timing'] = server_timing(
+            durations, query_timer.count, total * 1000
+        )
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'queries': query_timer.count,
+            **{
+                f'{name}_ms': round(duration, 1)
+                for name, duration in durations.items()
+            },
+        }))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Состояние маршрутизации чтения на реплики для каждого запроса.
+
+    Если запрос что-то записал, пользователь закрепляется за основной
+    базой (db_routers.pin_user).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_routers.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_routers.finish_request(token)
+        # Пользователя из токена DRF записывает и в request.user.
+        user = getattr(request, 'user', None)
+        if state['wrote'] and user is not None and user.is_authenticated:
+            db_routers.pin_user(user.pk)
+        return response
@@ -1,4 +1,25 @@
-from rest_framework import mixins, viewsets
+import hashlib
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, permissions, serializers, status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from reviews.deletion import fast_delete
+
+from . import cache, db_routers
+from .middleware import timed
+
+
+def cursor_fields(paginator):
+    """Поля, по которым курсорная пагинация читает позицию из строк."""
+    ordering = getattr(paginator, 'cursor_ordering', None) or ()
+    return [field.lstrip('-') for field in ordering]
 
 
 class CreateListDestroy(
@@ -9,3 +30,346 @@ class CreateListDestroy(
 ):
 
     pass
+
+
+class BulkCreateMixin:
+    """
+    POST со списком объектов создаёт их пакетом (BulkListSerializer).
+
+    Пакет проверяется целиком и вставляется в одной транзакции; при
+    ошибках ответ 400 со списком ошибок по элементам.
+    """
+    bulk_max_size = 1000
+    bulk_serializer_class = None
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        if len(request.data) > self.bulk_max_size:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {self.bulk_max_size} объектов за запрос'
+            ]})
+        serializer_class = (
+            self.bulk_serializer_class or self.get_serializer_class()
+        )
+        serializer = serializer_class(
+            data=request.data, many=True,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        serializer.save()
+
+
+class CachedListMixin:
+    """
+    Отдаёт list() из кеша; кеш сбрасывается сигналами при изменении модели.
+
+    Промах читается с основной базы: реплика может ещё не видеть запись,
+    сбросившую кеш, и устаревший ответ остался бы в кеше до следующего
+    изменения. Ключ вычисляется до чтения, чтобы ответ, прочитанный до
+    параллельной записи, не попал под новое поколение.
+    """
+    def list(self, request, *args, **kwargs):
+        key = cache.list_cache_key(
+            self.get_queryset().model, request.get_full_path()
+        )
+        data = cache.get_list(key)
+        if data is None:
+            db_routers.read_from_primary()
+            data = super().list(request, *args, **kwargs).data
+            cache.set_list(key, data)
+        return Response(data)
+
+
+class FastListMixin:
+    """
+    list() через ValuesSerializer: без экземпляров моделей и полей DRF.
+    """
+    fast_serializer = None
+
+    def serializer_options(self):
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        options = self.serializer_options()
+        rows = self.fast_serializer.values(
+            queryset, cursor_fields(self.paginator), options
+        )
+        page = self.paginate_queryset(rows)
+        with timed('serializer'):
+            data = self.fast_serializer.to_representation(
+                rows if page is None else page, queryset, options
+            )
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+class SparseFieldsMixin:
+    """
+    ?fields= и ?expand= для list() и retrieve().
+
+    fields — поля ответа через запятую, expand — связи, которые нужны
+    вложенными объектами (без параметра вложены все, как раньше).
+    Запрос сужается под выбранные поля: only(), а select_related и
+    prefetch_related — только для выводимых связей.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    sparse_actions = ('list', 'retrieve')
+
+    def parse_names(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        names = frozenset(filter(None, map(str.strip, value.split(','))))
+        unknown = names - set(allowed)
+        if unknown:
+            raise ValidationError({param: [
+                'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            ]})
+        return names
+
+    def serializer_options(self):
+        if self.action not in self.sparse_actions:
+            return {}
+        serializer_class = self.get_serializer_class()
+        options = {
+            'fields': self.parse_names(
+                self.fields_query_param, serializer_class().fields
+            ),
+            'expand': self.parse_names(
+                self.expand_query_param, serializer_class.expandable_fields
+            ),
+        }
+        return {
+            name: value for name, value in options.items()
+            if value is not None
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(
+            *args, **self.serializer_options(), **kwargs
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        options = self.serializer_options()
+        if not options:
+            return queryset
+        return self.trim_queryset(
+            queryset, self.get_serializer_class()(**options)
+        )
+
+    def trim_queryset(self, queryset, serializer):
+        opts = queryset.model._meta
+        only = {'pk', *cursor_fields(self.paginator)}
+        select, prefetch = [], []
+        for field in serializer.fields.values():
+            source = field.source.replace('.', '__')
+            many = isinstance(field, (serializers.ListSerializer,
+                                      serializers.ManyRelatedField))
+            child = getattr(field, 'child', None) or getattr(
+                field, 'child_relation', field
+            )
+            if isinstance(child, serializers.Serializer):
+                columns = [
+                    nested.source for nested in child.fields.values()
+                ]
+            elif isinstance(child, serializers.SlugRelatedField):
+                columns = [child.slug_field]
+            else:
+                only.add(source)
+                continue
+            if many:
+                prefetch.append(Prefetch(
+                    source,
+                    queryset=opts.get_field(source).related_model.objects
+                    .order_by('pk').only('pk', *columns)
+                ))
+            else:
+                select.append(source)
+                only.update(f'{source}__{column}' for column in columns)
+        return queryset.select_related(None).prefetch_related(None).only(
+            *only
+        ).select_related(*select).prefetch_related(*prefetch)
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list() и retrieve().
+
+    Валидаторы строятся по версии и дате изменения родительского ресурса
+    (get_version), поэтому на совпавший If-None-Match / If-Modified-Since
+    отвечаем 304 до выполнения запроса к списку и сериализации.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version(self):
+        """Возвращает (version, modified) или None, если ресурса нет."""
+        raise NotImplementedError
+
+    def conditional(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        version = self.get_version()
+        if version is None:
+            return handler(request, *args, **kwargs)
+        number, modified = version
+        etag = quote_etag(hashlib.md5(
+            f'{request.get_full_path()}:{request.accepted_renderer.format}:'
+            f'{number}:{modified.isoformat()}'.encode()
+        ).hexdigest())
+        last_modified = int(modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class FastDeleteMixin:
+    """
+    При FAST_DELETE объект удаляется вместе с зависимыми строками без
+    загрузки их в память (reviews.deletion).
+    """
+    def perform_destroy(self, instance):
+        if settings.FAST_DELETE:
+            fast_delete(type(instance)._default_manager.filter(pk=instance.pk))
+        else:
+            super().perform_destroy(instance)
+
+
+class NestedParentMixin:
+    """
+    Родитель вложенного маршрута titles/{title_id}/reviews/... .
+
+    Цепочка родителей из URL проверяется одним запросом (с JOIN по
+    parent_select_related) и загружается один раз за запрос; view.parent
+    доступен представлению, сериализаторам (context['view']) и правам.
+    """
+    parent_model = None
+    # {поле родителя: аргумент маршрута}.
+    parent_lookups = {}
+    parent_select_related = ()
+
+    def get_parent_queryset(self):
+        return self.parent_model.objects.select_related(
+            *self.parent_select_related
+        )
+
+    def get_parent(self):
+        """Родитель или None, если цепочки из URL нет."""
+        if not hasattr(self, '_parent'):
+            self._parent = self.get_parent_queryset().filter(**{
+                field: self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookups.items()
+            }).first()
+        return self._parent
+
+    @property
+    def parent(self):
+        parent = self.get_parent()
+        if parent is None:
+            raise Http404
+        return parent
+
+    def get_version(self):
+        # Изменения вложенных объектов меняют версию родителя.
+        parent = self.get_parent()
+        return parent and (parent.version, parent.modified)
+
+
+class SharedCacheMixin:
+    """
+    Cache-Control для микрокеша nginx (api.purge).
+
+    Ответы на анонимные GET одинаковы для всех, их кеширует nginx;
+    ответы пользователям с токеном — только клиент. 404 тоже кешируется,
+    чтобы обновление после удаления заменило прежний ответ.
+    """
+    shared_cache_statuses = (200, 404)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        patch_vary_headers(response, ('Authorization',))
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=0)
+        elif response.status_code in self.shared_cache_statuses:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=settings.PROXY_CACHE_SECONDS,
+                stale_while_revalidate=settings.PROXY_CACHE_STALE_SECONDS,
+            )
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы читают с реплики (api.db_routers).
+
+    Решение принимается после аутентификации: пользователь, недавно
+    писавший в базу, читает с основной.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS:
+            db_routers.read_from_replica(request.user)
+
+
+class TimedViewMixin:
+    """
+    Время представления, аутентификации и проверки прав для Server-Timing.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        with timed('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('permissions'):
+            super().check_object_permissions(request, obj)
+
+
+class TimedSerializerMixin:
+    """
+    Время сериализации и валидации для Server-Timing (вместе с SQL,
+    выполненным внутри сериализатора).
+    """
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+    def run_validation(self, data=serializers.empty):
+        with timed('serializer'):
+            return super().run_validation(data)
@@ -0,0 +1,53 @@
+from rest_framework.pagination import (CursorPagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Постраничная навигация по номеру страницы с курсорным режимом по запросу.
+
+    Курсорный режим включается параметром ?pagination=cursor (или наличием
+    ?cursor=): страницы выбираются по ключу cursor_ordering без COUNT(*)
+    и OFFSET, поэтому не замедляются с глубиной.
+    """
+    cursor_ordering = None
+    mode_query_param = 'pagination'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = CursorPagination()
+        self.cursor_paginator.ordering = self.cursor_ordering
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class ReviewPagination(OptionalCursorPagination):
+    cursor_ordering = ('-pub_date', '-id')
+
+
+class CommentPagination(OptionalCursorPagination):
+    cursor_ordering = ('id',)
+
+
+class TopTitlesPagination(LimitOffsetPagination):
+    default_limit = 10
+    max_limit = 100
+
+
+class ActivityPagination(CursorPagination):
+    # Совпадает с индексом activity_pub_date_idx.
+    ordering = ('-pub_date', '-id')
@@ -0,0 +1,72 @@
+"""Сброс ответов API, закешированных nginx (infra/nginx/default.conf).
+
+Анонимные GET к произведениям, жанрам и категориям nginx хранит
+PROXY_CACHE_SECONDS секунд (SharedCacheMixin выставляет Cache-Control).
+После коммита изменений purge() передаёт затронутые пути бэкенду
+CACHE_PURGE_BACKEND. NginxPurger перезапрашивает их через внутренний
+сервер nginx (CACHE_PURGE_URL), который обходит кеш и сохраняет свежий
+ответ под тем же ключом: у nginx без коммерческих модулей нет удаления
+по ключу. Варианты с параметрами запроса устаревают сами за
+PROXY_CACHE_SECONDS.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('api.purge')
+
+
+def title_paths(title_id=None):
+    """Пути, в ответах которых есть произведение title_id."""
+    paths = [reverse('api:titles-list'), reverse('api:titles-top')]
+    if title_id is not None:
+        paths += [
+            reverse('api:titles-detail', args=[title_id]),
+            reverse('api:titles-stats', args=[title_id]),
+        ]
+    return paths
+
+
+def purge(paths):
+    """Сбрасывает пути в кеше nginx после коммита текущей транзакции."""
+    backend = import_string(settings.CACHE_PURGE_BACKEND)()
+    paths = sorted(set(paths))
+    transaction.on_commit(lambda: backend.purge(paths))
+
+
+class NullPurger:
+    """Без кеша перед приложением."""
+
+    def purge(self, paths):
+        pass
+
+
+class NginxPurger:
+    """Обновляет пути в кеше nginx запросами к CACHE_PURGE_URL.
+
+    Запросы идут в фоновых потоках: ответ на запись не ждёт их, а при
+    одном воркере gunicorn обновление обслуживается после него.
+    """
+    executor = ThreadPoolExecutor(max_workers=2)
+
+    def purge(self, paths):
+        if not settings.CACHE_PURGE_URL:
+            return
+        for path in paths:
+            self.executor.submit(
+                self.refresh, settings.CACHE_PURGE_URL.rstrip('/') + path
+            )
+
+    @staticmethod
+    def refresh(url):
+        try:
+            urlopen(url, timeout=settings.CACHE_PURGE_TIMEOUT).close()
+        except OSError as e:
+            # 404 удалённого объекта тоже сохраняется в кеше nginx.
+            if getattr(e, 'code', None) != 404:
+                logger.warning('Cache purge of %s failed: %s', url, e)
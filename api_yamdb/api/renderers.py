@@ -0,0 +1,67 @@
+import decimal
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# В этом диапазоне orjson и json записывают float одинаково; вне его json
+# переходит к экспоненте (1e-05, 1e+16), а orjson пишет 0.00001 и 1e16.
+FLOAT_RANGE = (1e-4, 1e16)
+
+
+def same_floats(data):
+    """Запишет ли orjson все числа с плавающей точкой в data как json."""
+    if isinstance(data, dict):
+        return all(same_floats(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return all(same_floats(value) for value in data)
+    if isinstance(data, (float, decimal.Decimal)):
+        value = abs(float(data))
+        return value == 0 or (
+            math.isfinite(value) and FLOAT_RANGE[0] <= value < FLOAT_RANGE[1]
+        )
+    return True
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же выводом, что и у стандартного.
+
+    Без orjson, с отступами (?format=json; indent=4), при нестрогих
+    настройках JSON или с числами, которые orjson запишет иначе
+    (same_floats), рендерит стандартный JSONRenderer.
+    """
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact
+            and not self.ensure_ascii
+            and self.get_indent(
+                accepted_media_type, renderer_context or {}
+            ) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.use_orjson(accepted_media_type, renderer_context) or (
+                not same_floats(data)):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(
+            data,
+            default=encoders.JSONEncoder().default,
+            # Даты — через кодировщик DRF (миллисекунды и Z вместо +00:00).
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Как в JSONRenderer: U+2028 и U+2029 недопустимы в JavaScript.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
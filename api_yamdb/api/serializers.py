@@ -1,10 +1,231 @@
 from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from rest_framework.validators import UniqueValidator
+from reviews.models import (Activity, Category, Comment, Genre, Review, Title,
+                            TitleRanking, TitleStats, User)
+from reviews.signals import bulk_created
 
+from .mixins import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который в пакете берёт объекты из кеша контекста.
+
+    BulkListSerializer заранее загружает все упомянутые в пакете slug
+    одним запросом на поле; вне пакета поле работает как обычно.
+    """
+    @property
+    def cache_key(self):
+        return (self.get_queryset().model, self.slug_field)
+
+    def to_internal_value(self, data):
+        objects = self.context.get('slug_cache', {}).get(self.cache_key)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[smart_str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Пакетное создание: slug-поля разрешаются одним запросом на поле,
+    объекты вставляются bulk_create в одной транзакции, ошибки
+    возвращаются списком по элементам.
+    """
+    def slug_fields(self):
+        for name, field in self.child.fields.items():
+            many = isinstance(field, serializers.ManyRelatedField)
+            relation = field.child_relation if many else field
+            if isinstance(relation, CachedSlugRelatedField):
+                yield name, relation, many
+
+    def prefetch_slugs(self, data):
+        cache = self._context.setdefault('slug_cache', {})
+        for name, field, many in self.slug_fields():
+            slugs = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                values = value if many and isinstance(value, list) else [
+                    value
+                ]
+                slugs.update(
+                    smart_str(slug) for slug in values
+                    if isinstance(slug, (str, int))
+                )
+            cache[field.cache_key] = {
+                smart_str(getattr(obj, field.slug_field)): obj
+                for obj in field.get_queryset().filter(
+                    **{f'{field.slug_field}__in': slugs}
+                )
+            }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prefetch_slugs(data)
+            self.child.prefetch_batch(data)
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        m2m = [
+            field for field in model._meta.many_to_many
+            if any(field.name in attrs for attrs in validated_data)
+        ]
+        related = [
+            {field.name: attrs.pop(field.name, []) for field in m2m}
+            for attrs in validated_data
+        ]
+        objs = [model(**attrs) for attrs in validated_data]
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            if (connections[using].features.can_return_ids_from_bulk_insert
+                    or not self.needs_ids(m2m)):
+                model.objects.bulk_create(objs)
+                for field in m2m:
+                    self.create_m2m(field, objs, related)
+                # Получатели видят объекты вместе со связями M2M.
+                bulk_created.send(sender=model, objs=objs)
+            else:
+                # SQLite в Django 2.2 не возвращает id из bulk_create;
+                # сохранение по одному отправляет обычные post_save
+                # и m2m_changed.
+                for obj, values in zip(objs, related):
+                    obj.save()
+                    for name, targets in values.items():
+                        getattr(obj, name).add(*targets)
+            for field in m2m:
+                self.cache_m2m(field, objs, related)
+        return objs
+
+    def needs_ids(self, m2m):
+        """Нужны ли id созданных объектов: для связей M2M или в ответе.
+
+        Справочникам (категории, жанры) id не нужны, и они вставляются
+        bulk_create на любой базе; получатели bulk_created для них
+        id не читают.
+        """
+        return bool(m2m) or self.child.Meta.model._meta.pk.name in (
+            self.child.fields
+        )
+
+    def create_m2m(self, field, objs, related):
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        through.objects.bulk_create([
+            through(**{source: obj, target: target_obj})
+            for obj, values in zip(objs, related)
+            for target_obj in values[field.name]
+        ])
+
+    def cache_m2m(self, field, objs, related):
+        # Для ответа связи берутся из памяти, а не запросом на объект.
+        for obj, values in zip(objs, related):
+            queryset = getattr(obj, field.name).all()
+            queryset._result_cache = list(values[field.name])
+            queryset._prefetch_done = True
+            obj._prefetched_objects_cache = {
+                **getattr(obj, '_prefetched_objects_cache', {}),
+                field.name: queryset,
+            }
+
+
+class BulkCreateSerializerMixin:
+    """
+    Сериализатор, который можно создавать пакетом (many=True).
+
+    В пакете уникальность полей проверяется не UniqueValidator на каждый
+    элемент, а одним запросом на поле и по уже принятым элементам пакета.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        self._unique_fields = set()
+        if isinstance(self.parent, BulkListSerializer):
+            for name, field in fields.items():
+                validators = [
+                    validator for validator in field.validators
+                    if not isinstance(validator, UniqueValidator)
+                ]
+                if len(validators) < len(field.validators):
+                    field.validators = validators
+                    self._unique_fields.add(name)
+        return fields
+
+    def prefetch_batch(self, data):
+        """Загружает данные для проверки всего пакета разом."""
+        model = self.Meta.model
+        self.taken = {}
+        unique_fields = [
+            name for name in self.fields if name in self._unique_fields
+        ]
+        for name in unique_fields:
+            values = {
+                item[name] for item in data
+                if isinstance(item, dict) and isinstance(item.get(name), str)
+            }
+            self.taken[name] = set(model.objects.filter(
+                **{f'{name}__in': values}
+            ).values_list(name, flat=True))
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        taken = getattr(self, 'taken', {})
+        errors = {
+            name: [UniqueValidator.message] for name, values in taken.items()
+            if attrs.get(name) in values
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        for name, values in taken.items():
+            values.add(attrs.get(name))
+        return attrs
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Сериализатор с ?fields= и ?expand= (см. api.mixins.SparseFieldsMixin).
+
+    fields — имена выводимых полей, expand — связи из expandable_fields,
+    которые выводятся вложенными объектами; остальные связи из
+    expandable_fields выводятся slug. None — без ограничений.
+    """
+    # {поле: slug_field} для связей, вложенных только по ?expand=.
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.only_fields = fields
+        self.expand = expand
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.only_fields is not None:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in self.only_fields
+            }
+        if self.expand is not None:
+            for name, slug_field in self.expandable_fields.items():
+                if name in fields and name not in self.expand:
+                    fields[name] = serializers.SlugRelatedField(
+                        slug_field=slug_field, read_only=True,
+                        many=isinstance(
+                            fields[name], serializers.ListSerializer
+                        )
+                    )
+        return fields
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = (
@@ -14,7 +235,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
-class SignUpSerializer(serializers.ModelSerializer):
+class SignUpSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = User
@@ -26,7 +247,7 @@ class SignUpSerializer(serializers.ModelSerializer):
         return value
 
 
-class GetTokenSerializer(serializers.Serializer):
+class GetTokenSerializer(TimedSerializerMixin, serializers.Serializer):
     username = serializers.CharField(max_length=256)
     confirmation_code = serializers.CharField(max_length=256)
 
@@ -37,51 +258,83 @@ class GetTokenSerializer(serializers.Serializer):
         return data
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, BulkCreateSerializerMixin,
+                         serializers.ModelSerializer):
 
     class Meta:
         model = Category
         fields = ('name', 'slug')
         lookup_field = 'slug'
+        list_serializer_class = BulkListSerializer
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, BulkCreateSerializerMixin,
+                      serializers.ModelSerializer):
 
     class Meta:
         model = Genre
         fields = ('name', 'slug')
         lookup_field = 'slug'
+        list_serializer_class = BulkListSerializer
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    rating = serializers.IntegerField(
-        source='reviews__score__avg',
-        read_only=True
-    )
+class TitleSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
+    rating = serializers.IntegerField(read_only=True)
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     description = serializers.CharField(required=False)
 
+    expandable_fields = {'category': 'slug', 'genre': 'slug'}
+
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'rating', 'category', 'genre', 'description', 'name', 'year'
+        )
 
 
-class TitlePostSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+class TitlePostSerializer(TimedSerializerMixin, BulkCreateSerializerMixin,
+                          serializers.ModelSerializer):
+    category = CachedSlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
         slug_field='slug', queryset=Genre.objects.all(),
         many=True
     )
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'category', 'genre', 'name', 'year', 'description')
         model = Title
+        list_serializer_class = BulkListSerializer
+
+
+class TitleStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    scores = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta:
+        model = TitleStats
+        fields = ('title', 'reviews_count', 'last_review', 'scores')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleRankingSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    score = serializers.DecimalField(
+        max_digits=6, decimal_places=2, coerce_to_string=False,
+        read_only=True
+    )
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        model = TitleRanking
+        fields = ('score', 'reviews_count', 'title')
+
+
+class ReviewSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         many=False,
         read_only=True,
@@ -91,15 +344,14 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = '__all__'
+        fields = ('id', 'author', 'text', 'score', 'pub_date', 'title')
         read_only_fields = ('title',)
 
     def validate(self, data):
-        title_id = self.context['view'].kwargs.get('title_id')
-        author = self.context.get('request').user
-        title = get_object_or_404(Title, id=title_id)
-        if (title.reviews.filter(author=author).exists()
-                and self.context.get('request').method != 'PATCH'):
+        # Произведение и признак отзыва автора загружает представление
+        # (ReviewsViewSet.get_parent_queryset).
+        if (self.context['request'].method != 'PATCH'
+                and self.context['view'].parent.user_reviewed):
             raise serializers.ValidationError(
                 'Возможено добавить только один отзыв!'
             )
@@ -113,7 +365,35 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class ReviewBulkSerializer(BulkCreateSerializerMixin, ReviewSerializer):
+    """Пакетная загрузка отзывов администратором: автор задаётся в данных."""
+    author = CachedSlugRelatedField(
+        slug_field='username', queryset=User.objects.all()
+    )
+
+    class Meta(ReviewSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+    def prefetch_batch(self, data):
+        super().prefetch_batch(data)
+        authors = self.context['slug_cache'][self.fields['author'].cache_key]
+        self.reviewed = set(Review.objects.filter(
+            title_id=self.context['view'].kwargs.get('title_id'),
+            author__in=authors.values()
+        ).values_list('author_id', flat=True))
+
+    def validate(self, data):
+        author = data['author']
+        if author.pk in self.reviewed:
+            raise serializers.ValidationError(
+                'Возможено добавить только один отзыв!'
+            )
+        self.reviewed.add(author.pk)
+        return data
+
+
+class CommentSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
@@ -121,3 +401,43 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class IncludedReviewSerializer(ReviewSerializer):
+    """Отзыв в ответе произведения с ?include=reviews."""
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comments_count',)
+        read_only_fields = fields
+
+
+class ReviewWithCommentsSerializer(IncludedReviewSerializer):
+    """Отзыв с первыми комментариями для ?include=reviews.
+
+    Комментарии загружает представление в first_comments
+    (TitlesViewSet.get_compound).
+    """
+    comments = CommentSerializer(
+        many=True, read_only=True, source='first_comments'
+    )
+
+    class Meta(IncludedReviewSerializer.Meta):
+        fields = IncludedReviewSerializer.Meta.fields + ('comments',)
+
+
+class ActivitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        read_only=True, slug_field='username'
+    )
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+    text = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Activity
+        fields = (
+            'id', 'kind', 'pub_date', 'author', 'title', 'review', 'comment',
+            'text'
+        )
+
+    def get_text(self, obj):
+        return (obj.comment or obj.review).text
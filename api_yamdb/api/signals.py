@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.signals import bulk_created, bulk_deleted
+
+from . import cache, purge
+from .authentication import forget_version, remember_version
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(bulk_created, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(bulk_created, sender=Genre)
+def invalidate_list_cache(sender, **kwargs):
+    cache.invalidate(sender)
+    # Повторно после коммита: параллельный запрос мог успеть
+    # закешировать ещё не изменённые данные.
+    transaction.on_commit(lambda: cache.invalidate(sender))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        remember_version(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_version(instance.pk)
+
+
+@receiver(bulk_deleted, sender=User)
+def users_bulk_deleted(sender, pks, **kwargs):
+    for pk in pks:
+        forget_version(pk)
+
+
+DIRECTORY_ROUTES = {
+    Category: 'api:categories-list',
+    Genre: 'api:genres-list',
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(bulk_created, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(bulk_created, sender=Genre)
+def purge_directory(sender, **kwargs):
+    # Категории и жанры вложены в списки произведений.
+    purge.purge([reverse(DIRECTORY_ROUTES[sender]), *purge.title_paths()])
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def purge_title(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge.purge(purge.title_paths(
+            instance.pk if sender is Title else instance.title_id
+        ))
+
+
+@receiver(bulk_created, sender=Title)
+@receiver(bulk_created, sender=Review)
+@receiver(bulk_deleted)
+def purge_titles(sender, **kwargs):
+    purge.purge(purge.title_paths())
@@ -0,0 +1,91 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.activity import backfill_activity
+from reviews.models import Activity, Comment, Review, Title, User
+
+
+class ActivityFeedTest(APITestCase):
+    url = '/api/v1/activity/'
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@ya.ru')
+            for number in range(3)
+        ]
+        self.titles = [
+            Title.objects.create(name=f'Фильм {number}', year=2000)
+            for number in range(2)
+        ]
+        self.reviews = [
+            Review.objects.create(
+                title=title, author=user, text=f'Отзыв {user.username}',
+                score=5
+            )
+            for title in self.titles for user in self.users[:2]
+        ]
+        self.comment = Comment.objects.create(
+            review=self.reviews[0], author=self.users[2], text='Ответ'
+        )
+
+    def feed(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_newest_first_across_titles(self):
+        results = self.feed()['results']
+        self.assertEqual(
+            [(entry['kind'], entry['text']) for entry in results],
+            [('comment', 'Ответ')] + [
+                ('review', review.text) for review in reversed(self.reviews)
+            ]
+        )
+        self.assertEqual(results[0]['author'], 'user2')
+        self.assertEqual(results[0]['title'], self.titles[0].pk)
+        self.assertEqual(results[0]['review'], self.reviews[0].pk)
+
+    def test_keyset_pages(self):
+        for number in range(10):
+            Comment.objects.create(
+                review=self.reviews[1], author=self.users[0],
+                text=f'Комментарий {number}'
+            )
+        data = self.feed()
+        ids = [entry['id'] for entry in data['results']]
+        self.assertIn('cursor=', data['next'])
+        self.assertNotIn('count', data)
+        data = self.feed(data['next'])
+        ids += [entry['id'] for entry in data['results']]
+        self.assertIsNone(data['next'])
+        self.assertEqual(
+            ids,
+            list(Activity.objects.order_by('-pub_date', '-id')
+                 .values_list('id', flat=True))
+        )
+
+    def test_single_table_read(self):
+        with CaptureQueriesContext(connection) as context:
+            self.feed()
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertIn('"reviews_activity"', sql)
+        self.assertNotIn('UNION', sql)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_deleted_objects_leave_feed(self):
+        self.comment.delete()
+        self.reviews[1].delete()
+        self.assertEqual(Activity.objects.count(), 3)
+        self.assertNotIn(
+            'comment', [entry['kind'] for entry in self.feed()['results']]
+        )
+
+    def test_backfill(self):
+        Activity.objects.all().delete()
+        self.assertEqual(backfill_activity(connection), 5)
+        self.assertEqual(backfill_activity(connection), 0)
+        self.assertEqual(
+            Activity.objects.filter(comment=self.comment).get().review,
+            self.reviews[0]
+        )
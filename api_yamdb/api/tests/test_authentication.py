@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, User
+
+from .. import authentication
+
+
+class ClaimsAuthenticationTest(APITestCase):
+    url = '/api/v1/categories/'
+
+    def setUp(self):
+        cache.clear()
+        authentication._local_versions.clear()
+        self.user = User.objects.create(
+            username='admin', email='admin@yamdb.ru', role='admin'
+        )
+
+    def post_category(self, token, slug):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                self.url, {'name': slug, 'slug': slug}
+            )
+        return response, context
+
+    def user_queries(self, context):
+        return [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_user"' in query['sql']
+        ]
+
+    def test_user_is_built_from_claims(self):
+        token = authentication.issue_access_token(self.user)
+        response, context = self.post_category(token, 'movie')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.user_queries(context), [])
+
+    def test_role_change_revokes_claims(self):
+        token = authentication.issue_access_token(self.user)
+        self.user.role = 'user'
+        self.user.save()
+        authentication._local_versions.clear()
+
+        response, context = self.post_category(token, 'movie')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotEqual(self.user_queries(context), [])
+        self.assertFalse(Category.objects.exists())
+
+    def test_unrelated_change_keeps_version(self):
+        token = authentication.issue_access_token(self.user)
+        self.user.bio = 'Новая биография'
+        self.user.save()
+        response, context = self.post_category(token, 'movie')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.user_queries(context), [])
+
+    def test_token_without_claims(self):
+        token = AccessToken.for_user(self.user)
+        response, context = self.post_category(token, 'movie')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(self.user_queries(context), [])
+
+    def test_me_returns_profile_from_database(self):
+        self.user.bio = 'Биография'
+        self.user.save()
+        token = authentication.issue_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'admin@yamdb.ru')
+        self.assertEqual(response.data['bio'], 'Биография')
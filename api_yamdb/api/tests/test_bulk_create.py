@@ -0,0 +1,164 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Category, Genre, Review, Title, TitleRanking, User
+
+
+class BulkCreateTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ADMIN
+        )
+        self.user = User.objects.create(username='user', email='user@ya.ru')
+        self.client.force_authenticate(self.admin)
+        Category.objects.create(name='Фильм', slug='movie')
+        for slug in ('drama', 'comedy'):
+            Genre.objects.create(name=slug, slug=slug)
+
+    def titles(self, amount, **extra):
+        return [
+            {
+                'name': f'Произведение {number}', 'year': 2000,
+                'description': 'Описание', 'category': 'movie',
+                'genre': ['drama', 'comedy'], **extra,
+            }
+            for number in range(amount)
+        ]
+
+    def slug_queries(self, amount):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/v1/titles/', self.titles(amount), format='json'
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and ('"reviews_genre"' in query['sql']
+                 or '"reviews_category"' in query['sql'])
+        ]
+
+    def test_titles_created_with_relations(self):
+        response = self.client.post(
+            '/api/v1/titles/', self.titles(3), format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0]['genre'], ['drama', 'comedy'])
+        self.assertEqual(Title.objects.count(), 3)
+        self.assertEqual(Title.genre.through.objects.count(), 6)
+
+    def inserts(self, url, data):
+        """Ответ и INSERT по таблицам за пакетную загрузку."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        tables = {}
+        for query in context.captured_queries:
+            if query['sql'].startswith('INSERT INTO'):
+                table = query['sql'].split('"')[1]
+                tables[table] = tables.get(table, 0) + 1
+        return response, tables
+
+    def test_directories_inserted_in_one_query(self):
+        for url, model in (('/api/v1/categories/', Category),
+                           ('/api/v1/genres/', Genre)):
+            with self.subTest(url=url):
+                response, tables = self.inserts(url, [
+                    {'name': f'Новый {number}', 'slug': f'new{number}'}
+                    for number in range(5)
+                ])
+                self.assertEqual(tables, {model._meta.db_table: 1})
+                self.assertEqual(len(response.data), 5)
+                self.assertTrue(model.objects.filter(slug='new4').exists())
+
+    @skipUnlessDBFeature('can_return_ids_from_bulk_insert')
+    def test_titles_inserted_in_one_query(self):
+        response, tables = self.inserts('/api/v1/titles/', self.titles(5))
+        self.assertEqual(tables[Title._meta.db_table], 1)
+        self.assertEqual(tables[Title.genre.through._meta.db_table], 1)
+        self.assertEqual(
+            [title['id'] for title in response.data],
+            list(Title.objects.order_by('pk').values_list('pk', flat=True))
+        )
+        self.assertEqual(Title.genre.through.objects.count(), 10)
+        # Получатели bulk_created видят произведения с жанрами.
+        self.assertEqual(TitleRanking.objects.count(), 15)
+
+    def test_slugs_resolved_once_per_field(self):
+        self.assertEqual(len(self.slug_queries(2)), 2)
+        self.assertEqual(len(self.slug_queries(20)), 2)
+
+    def test_errors_reported_per_item(self):
+        data = self.titles(3)
+        data[1]['genre'] = ['drama', 'horror']
+        data[2]['category'] = 'book'
+        response = self.client.post('/api/v1/titles/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ['genre'])
+        self.assertEqual(list(response.data[2]), ['category'])
+        self.assertFalse(Title.objects.exists())
+
+    def test_unique_slugs_checked_across_batch(self):
+        self.client.get('/api/v1/categories/')
+        response = self.client.post('/api/v1/categories/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Фильм', 'slug': 'movie'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('slug', response.data[1])
+        self.assertIn('slug', response.data[2])
+
+        response = self.client.post('/api/v1/categories/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Музыка', 'slug': 'music'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get('/api/v1/categories/')
+        self.assertEqual(response.data['count'], 3)
+
+    def test_batch_size_limited(self):
+        response = self.client.post(
+            '/api/v1/genres/',
+            [{'name': str(number), 'slug': f'g{number}'}
+             for number in range(1001)],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Genre.objects.count(), 2)
+
+    def test_reviews_bulk_for_admin_only(self):
+        title = Title.objects.create(name='Фильм', year=2000)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = [
+            {'author': 'admin', 'text': 'Отзыв', 'score': 10},
+            {'author': 'user', 'text': 'Отзыв', 'score': 5},
+        ]
+        self.client.force_authenticate(self.user)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(url, data + data[:1], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data[2])
+
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [review['author'] for review in response.data],
+            ['admin', 'user']
+        )
+        title.refresh_from_db()
+        self.assertEqual(
+            (title.reviews_count, title.rating_sum, title.rating),
+            (2, 15, 7)
+        )
+        self.assertEqual(Review.objects.count(), 2)
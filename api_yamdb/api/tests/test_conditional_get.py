@@ -0,0 +1,115 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class ConditionalGetTest(APITestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Фильм', slug='movie')
+        self.title = Title.objects.create(
+            name='Title', year=2000, category=self.category
+        )
+        self.user = User.objects.create(username='user', email='u@ya.ru')
+        self.review = Review.objects.create(
+            title=self.title, author=self.user, text='text', score=5
+        )
+        self.title_url = f'/api/v1/titles/{self.title.pk}/'
+        self.reviews_url = f'{self.title_url}reviews/'
+        self.comments_url = f'{self.reviews_url}{self.review.pk}/comments/'
+
+    def assert_not_modified(self, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304, url)
+        self.assertEqual(len(context), 1, url)
+
+    def assert_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertNotEqual(response['ETag'], etag, url)
+
+    def test_not_modified(self):
+        for url in (self.title_url, self.reviews_url, self.comments_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assert_not_modified(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assert_not_modified(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+
+    def test_changes_invalidate_validators(self):
+        etags = {
+            url: self.client.get(url)['ETag']
+            for url in (self.title_url, self.reviews_url, self.comments_url)
+        }
+        self.review.text = 'new text'
+        self.review.save()
+        self.assert_modified(self.title_url, etags[self.title_url])
+        self.assert_modified(self.reviews_url, etags[self.reviews_url])
+
+        Comment.objects.create(
+            review=self.review, author=self.user, text='comment'
+        )
+        self.assert_modified(self.comments_url, etags[self.comments_url])
+
+        etag = self.client.get(self.title_url)['ETag']
+        self.category.name = 'Кино'
+        self.category.save()
+        self.assert_modified(self.title_url, etag)
+
+    def test_genre_clear_invalidates_validators(self):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title.genre.add(genre)
+        response = self.client.get(self.title_url)
+        self.assertEqual(response.data['genre'][0]['slug'], 'drama')
+
+        # Очистка со стороны жанра: m2m_changed с reverse=True.
+        genre.genres.clear()
+        self.assert_modified(self.title_url, response['ETag'])
+        self.assertEqual(self.client.get(self.title_url).data['genre'], [])
+
+    def etags(self):
+        return {
+            url: self.client.get(url)['ETag']
+            for url in (self.title_url, self.reviews_url, self.comments_url)
+        }
+
+    def rename(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.patch(
+            '/api/v1/users/me/', {'username': f'{user.username}-new'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.force_authenticate(None)
+
+    def test_author_rename_invalidates_validators(self):
+        other = User.objects.create(username='other', email='o@ya.ru')
+        Comment.objects.create(review=self.review, author=other, text='c')
+
+        # Имя автора отзыва в комментариях не выводится.
+        etags = self.etags()
+        self.rename(self.user)
+        self.assert_modified(self.title_url, etags[self.title_url])
+        self.assert_modified(self.reviews_url, etags[self.reviews_url])
+        self.assert_not_modified(
+            self.comments_url, HTTP_IF_NONE_MATCH=etags[self.comments_url]
+        )
+
+        etags = self.etags()
+        self.rename(other)
+        for url, etag in etags.items():
+            self.assert_modified(url, etag)
+        self.assertEqual(
+            self.client.get(self.comments_url).data['results'][0]['author'],
+            'other-new'
+        )
+
+    def test_query_string_changes_etag(self):
+        etag = self.client.get(self.reviews_url)['ETag']
+        response = self.client.get(
+            f'{self.reviews_url}?pagination=cursor', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
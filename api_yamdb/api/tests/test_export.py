@@ -0,0 +1,52 @@
+import json
+
+from rest_framework.test import APITestCase
+from reviews.models import Category, Review, Title, User
+
+
+class ExportEndpointTest(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ADMIN
+        )
+        self.user = User.objects.create(username='user', email='user@ya.ru')
+        category = Category.objects.create(name='Фильм', slug='movie')
+        self.title = Title.objects.create(
+            name='Фильм', year=2000, category=category
+        )
+        Review.objects.create(
+            title=self.title, author=self.user, text='Отзыв', score=8
+        )
+
+    def test_admin_only(self):
+        url = '/api/v1/export/titles.ndjson'
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_streams_ndjson_and_csv(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/v1/export/titles.ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        document = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(document['category']['slug'], 'movie')
+        self.assertEqual(document['rating'], 8)
+        self.assertEqual(document['reviews'][0]['author'], 'user')
+
+        response = self.client.get('/api/v1/export/title.csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode().splitlines(),
+            ['id,name,year,description,category',
+             f'{self.title.pk},Фильм,2000,,{self.title.category_id}']
+        )
+
+    def test_unknown_export(self):
+        self.client.force_authenticate(self.admin)
+        for url in ('/api/v1/export/titles.csv',
+                    '/api/v1/export/review.ndjson'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,122 @@
+import datetime
+import decimal
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from ..renderers import ORJSONRenderer
+from ..views import CommentViewSet, ReviewsViewSet, TitlesViewSet
+
+
+class FastListTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+            for number in range(3)
+        ]
+        users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@yamdb.ru')
+            for number in range(3)
+        ]
+        self.titles = []
+        for number in range(12):
+            title = Title.objects.create(
+                name=f'Произведение {number}',
+                year=2000 + number,
+                description='Строка\u2028с «разделителем»',
+                category=category if number % 3 else None,
+            )
+            title.genre.set(genres[:number % 4])
+            self.titles.append(title)
+        title = self.titles[1]
+        for number, user in enumerate(users):
+            review = Review.objects.create(
+                title=title, author=user, score=number + 5, text='Отзыв'
+            )
+            for _ in range(2):
+                Comment.objects.create(review=review, author=user,
+                                       text='Комментарий')
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(microseconds=1)
+        )
+        self.review = review
+
+    def get_both(self, url):
+        fast = self.client.get(url)
+        cache.clear()
+        with ExitStack() as stack:
+            for view in (TitlesViewSet, ReviewsViewSet, CommentViewSet):
+                stack.enter_context(
+                    mock.patch.object(view, 'fast_serializer', None)
+                )
+            stack.enter_context(mock.patch.object(
+                ORJSONRenderer, 'use_orjson', return_value=False
+            ))
+            regular = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(regular.status_code, 200)
+        return fast.content, regular.content
+
+    def test_same_bytes_as_model_serializers(self):
+        title = self.titles[1]
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/titles/?page=2',
+            '/api/v1/titles/?genre=g1',
+            f'/api/v1/titles/{title.pk}/reviews/',
+            f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor',
+            f'/api/v1/titles/{title.pk}/reviews/{self.review.pk}/comments/',
+        ):
+            with self.subTest(url=url):
+                fast, regular = self.get_both(url)
+                self.assertEqual(fast, regular)
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'text': 'Юникод\u2028\u2029',
+            'lazy': gettext_lazy('Not found.'),
+            'date': timezone.now(),
+            'decimal': decimal.Decimal('1.5'),
+            1: [None, True, 2, (3, 4)],
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_floats_match_json_renderer(self):
+        floats = [0.0, -0.0, 0.1, 1 / 3, 7.0, 5.857142857142857, 1e-4,
+                  1e15 + 0.5, 2.5e-5, 1e16, 1e22, -3e-9]
+        for value in floats + [decimal.Decimal('1e-7')]:
+            with self.subTest(value=value):
+                data = {'score': value, 'nested': [{'score': value}]}
+                self.assertEqual(
+                    ORJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_ranking_score_rendered_as_json_renderer(self):
+        user = User.objects.create(username='critic', email='c@ya.ru')
+        for score in (10, 7, 3):
+            title = Title.objects.create(name=f'Оценка {score}', year=2000)
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score
+            )
+        response = self.client.get('/api/v1/titles/top/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(
+            response.data['results'][0]['score'], decimal.Decimal
+        )
+        self.assertEqual(
+            response.content, JSONRenderer().render(response.data)
+        )
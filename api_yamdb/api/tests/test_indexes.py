@@ -0,0 +1,48 @@
+from django.db import connection
+from django.test import TestCase
+from reviews.models import Comment, Review, Title, TitleRanking
+
+from ..filters import TitleFilter, TitleRankingFilter
+from ..views import TitlesViewSet
+
+
+def query_plan(queryset):
+    """План запроса: EXPLAIN QUERY PLAN в SQLite, EXPLAIN в PostgreSQL."""
+    if connection.vendor == 'postgresql':
+        # На почти пустых таблицах планировщик предпочёл бы Seq Scan.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+class AccessPathIndexTest(TestCase):
+    """Запросы списков используют составные индексы под свои фильтры."""
+
+    def titles(self, **params):
+        return TitleFilter(params, queryset=TitlesViewSet.queryset).qs
+
+    def rankings(self, **params):
+        return TitleRankingFilter(
+            params, queryset=TitleRanking.objects.filter(reviews_count__gt=0)
+        ).qs.order_by('-score', 'title')
+
+    def test_lists_use_intended_indexes(self):
+        cases = (
+            (Review.objects.filter(title_id=1).select_related('author')
+             .order_by('-pub_date', '-id'), 'review_title_pub_date_idx'),
+            (Comment.objects.filter(review_id=1).select_related('author')
+             .order_by('id'), 'comment_review_id_idx'),
+            (self.titles(category='movie', year=2000),
+             'title_category_year_name_idx'),
+            (self.titles(year=2000), 'title_year_name_idx'),
+            (self.titles(genre='drama'), 'title_genre_genre_title_idx'),
+            (Title.objects.order_by('name'), 'title_name_idx'),
+            (self.rankings(), 'ranking_genre_score_idx'),
+            (self.rankings(genre='drama'), 'ranking_genre_score_idx'),
+            (self.rankings(genre='drama', category='movie'),
+             'ranking_category_score_idx'),
+            (self.rankings(year=2000), 'ranking_year_score_idx'),
+        )
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                self.assertIn(index, query_plan(queryset))
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Category, Genre
+
+
+class ListCacheTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(context)
+
+    def test_cached_until_model_changes(self):
+        for model, url in (
+            (Category, '/api/v1/categories/'),
+            (Genre, '/api/v1/genres/'),
+        ):
+            with self.subTest(url=url):
+                obj = model.objects.create(name='Старое', slug='old')
+                data, _ = self.get(url)
+                cached, queries = self.get(url)
+                self.assertEqual(queries, 0)
+                self.assertEqual(cached, data)
+
+                obj.name = 'Новое'
+                obj.save()
+                data, _ = self.get(url)
+                self.assertEqual(data['results'][0]['name'], 'Новое')
+
+                obj.delete()
+                data, _ = self.get(url)
+                self.assertEqual(data['count'], 0)
+
+    def test_query_string_is_part_of_key(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        Category.objects.create(name='Книга', slug='book')
+        self.get('/api/v1/categories/')
+        data, _ = self.get('/api/v1/categories/?search=Книга')
+        self.assertEqual(
+            [category['slug'] for category in data['results']], ['book']
+        )
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Comment, Review, Title, User
+
+
+class NestedParentTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='user', email='user@ya.ru')
+        self.other = User.objects.create(
+            username='other', email='other@ya.ru'
+        )
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.review = Review.objects.create(
+            title=self.title, author=self.other, text='Отзыв', score=5
+        )
+        self.reviews_url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        self.comments_url = (
+            f'{self.reviews_url}{self.review.pk}/comments/'
+        )
+        self.client.force_authenticate(self.user)
+
+    def selects(self, table, method, url, data=None):
+        """Ответ и число SELECT из таблицы table за запрос."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, len([
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+        ])
+
+    def test_parent_loaded_once(self):
+        response, selects = self.selects(
+            'reviews_title', 'post', self.reviews_url,
+            {'text': 'Отзыв', 'score': 7}
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(selects, 1)
+
+        response, selects = self.selects(
+            'reviews_review', 'post', self.comments_url, {'text': 'Ответ'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(selects, 1)
+        self.assertEqual(Comment.objects.get().review, self.review)
+
+        response, selects = self.selects(
+            'reviews_review', 'get', self.comments_url
+        )
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(selects, 1)
+
+    def test_one_review_per_author(self):
+        response = self.client.post(
+            self.reviews_url, {'text': 'Отзыв', 'score': 7}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        url = f'{self.reviews_url}{response.data["id"]}/'
+        response = self.client.post(
+            self.reviews_url, {'text': 'Отзыв', 'score': 3}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(url, {'score': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['score'], 3)
+
+    def test_parent_chain_checked(self):
+        other_title = Title.objects.create(name='Книга', year=2000)
+        url = (
+            f'/api/v1/titles/{other_title.pk}/reviews/{self.review.pk}'
+            '/comments/'
+        )
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(url, {'text': 'Ответ'}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            f'/api/v1/titles/{other_title.pk + 1}/reviews/',
+            {'text': 'Отзыв', 'score': 7}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.exists())
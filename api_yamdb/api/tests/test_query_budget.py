@@ -0,0 +1,147 @@
+from itertools import count
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+PAGE_SIZE = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+
+class QueryBudgetTest(APITestCase):
+    """Число запросов к БД не должно зависеть от размера страницы.
+
+    В бюджеты детальных и вложенных ресурсов входит запрос версии
+    родителя для ETag (ConditionalGetMixin).
+    """
+
+    def setUp(self):
+        self.sequence = count()
+        self.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=User.ADMIN
+        )
+        self.category = Category.objects.create(name='Фильм', slug='movie')
+        self.genre = Genre.objects.create(name='Драма', slug='drama')
+        self.title = self.add_titles(1)[0]
+        self.review = self.add_reviews(1)[0]
+
+    def next_number(self):
+        return next(self.sequence)
+
+    def add_users(self, amount):
+        users = []
+        for _ in range(amount):
+            number = self.next_number()
+            users.append(User.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru'
+            ))
+        return users
+
+    def add_titles(self, amount):
+        titles = []
+        for _ in range(amount):
+            title = Title.objects.create(
+                name=f'Title {self.next_number()}', year=2000,
+                category=self.category
+            )
+            title.genre.add(self.genre)
+            titles.append(title)
+        return titles
+
+    def add_reviews(self, amount):
+        return [
+            Review.objects.create(
+                title=self.title, author=author, text='text', score=5
+            )
+            for author in self.add_users(amount)
+        ]
+
+    def add_comments(self, amount):
+        return [
+            Comment.objects.create(
+                review=self.review, author=author, text='text'
+            )
+            for author in self.add_users(amount)
+        ]
+
+    def add_categories(self, amount):
+        for _ in range(amount):
+            number = self.next_number()
+            Category.objects.create(name=f'c{number}', slug=f'c{number}')
+
+    def add_genres(self, amount):
+        for _ in range(amount):
+            number = self.next_number()
+            Genre.objects.create(name=f'g{number}', slug=f'g{number}')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context)
+
+    def assert_query_budget(self, url, add_rows, budget):
+        """Проверяет, что полная страница стоит столько же запросов,
+        сколько страница из одной записи, и укладывается в бюджет."""
+        single = self.count_queries(url)
+        add_rows(PAGE_SIZE)
+        full = self.count_queries(url)
+        self.assertEqual(
+            single, full,
+            f'{url}: число запросов растёт с размером страницы '
+            f'({single} -> {full})'
+        )
+        self.assertLessEqual(full, budget, url)
+
+    def test_titles(self):
+        self.assert_query_budget('/api/v1/titles/', self.add_titles, 3)
+
+    def test_title_detail(self):
+        self.assert_query_budget(
+            f'/api/v1/titles/{self.title.pk}/', self.add_reviews, 3
+        )
+
+    def test_reviews(self):
+        self.assert_query_budget(
+            f'/api/v1/titles/{self.title.pk}/reviews/', self.add_reviews, 4
+        )
+
+    def test_reviews_cursor(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/?pagination=cursor'
+        self.assert_query_budget(url, self.add_reviews, 3)
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertFalse(any(
+                'COUNT(' in query['sql']
+                for query in context.captured_queries
+            ))
+            seen += [review['id'] for review in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(
+            seen,
+            list(self.title.reviews.order_by('-pub_date', '-id')
+                 .values_list('id', flat=True))
+        )
+
+    def test_comments(self):
+        self.add_comments(1)
+        self.assert_query_budget(
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+            f'{self.review.pk}/comments/',
+            self.add_comments, 4
+        )
+
+    def test_categories(self):
+        self.assert_query_budget(
+            '/api/v1/categories/', self.add_categories, 2
+        )
+
+    def test_genres(self):
+        self.assert_query_budget('/api/v1/genres/', self.add_genres, 2)
+
+    def test_users(self):
+        self.client.force_authenticate(self.admin)
+        self.assert_query_budget('/api/v1/users/', self.add_users, 2)
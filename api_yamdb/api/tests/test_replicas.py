@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from reviews.models import Category, Title, User
+
+from .. import db_routers
+
+REPLICA = 'replica'
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTest(APITestCase):
+    """Реплика — отдельный файл SQLite со схемой, но без данных.
+
+    Пустая реплика изображает отставание: всё, что прочитано с неё,
+    не видит записей основной базы.
+    """
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='user', email='user@ya.ru')
+        self.other = User.objects.create(
+            username='other', email='other@ya.ru'
+        )
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.url = f'/api/v1/titles/{self.title.pk}/reviews/'
+
+    def test_safe_requests_read_from_replica(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_writer_pinned_to_primary(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            self.url, {'text': 'Отзыв', 'score': 7}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertTrue(db_routers.is_pinned(self.user.pk))
+        self.assertFalse(db_routers.is_pinned(self.other.pk))
+
+    def test_list_cache_filled_from_primary(self):
+        url = '/api/v1/categories/'
+        self.assertEqual(self.client.get(url).data['count'], 0)
+        Category.objects.create(name='Фильмы', slug='movie')
+        # Запись сбросила кеш; реплика ещё не видит категорию.
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 1)
+
+    def test_outside_requests_use_primary(self):
+        router = db_routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Title), 'default')
+        token = db_routers.start_request()
+        try:
+            db_routers.read_from_replica(self.other)
+            self.assertEqual(router.db_for_read(Title), REPLICA)
+            self.assertEqual(router.db_for_write(Title), 'default')
+            self.assertEqual(router.db_for_read(Title), 'default')
+        finally:
+            state = db_routers.finish_request(token)
+        self.assertTrue(state['wrote'])
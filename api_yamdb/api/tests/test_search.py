@@ -0,0 +1,34 @@
+from rest_framework.test import APITestCase
+from reviews.models import Title
+
+
+class TitleSearchTest(APITestCase):
+
+    def search(self, query):
+        response = self.client.get('/api/v1/titles/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [title['name'] for title in response.data['results']]
+
+    def test_search_follows_title_changes(self):
+        title = Title.objects.create(
+            name='Мастер и Маргарита', year=1967,
+            description='Роман Михаила Булгакова'
+        )
+        Title.objects.create(name='Собачье сердце', year=1925)
+        self.assertEqual(self.search('Маргарита'), ['Мастер и Маргарита'])
+        self.assertEqual(self.search('Булгакова'), ['Мастер и Маргарита'])
+
+        title.name = 'Белая гвардия'
+        title.save()
+        self.assertEqual(self.search('Маргарита'), [])
+        self.assertEqual(self.search('гвардия'), ['Белая гвардия'])
+
+        title.delete()
+        self.assertEqual(self.search('гвардия'), [])
+
+    def test_name_matches_rank_first(self):
+        Title.objects.create(
+            name='Музыка', year=2000, description='Про сердце'
+        )
+        Title.objects.create(name='Сердце', year=2000, description='Книга')
+        self.assertEqual(self.search('Сердце'), ['Сердце', 'Музыка'])
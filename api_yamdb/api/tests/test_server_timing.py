@@ -0,0 +1,50 @@
+import json
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from reviews.models import Category, Genre, Title
+
+
+class ServerTimingTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(3):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000, category=category
+            )
+            title.genre.add(genre)
+
+    def metrics(self, response):
+        return {
+            entry.split(';')[0]: entry
+            for entry in response['Server-Timing'].split(', ')
+        }
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_header_and_log_line(self):
+        with self.assertLogs('api.timing', 'INFO') as logs:
+            response = self.client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        metrics = self.metrics(response)
+        self.assertEqual(
+            set(metrics),
+            {'db', 'auth', 'permissions', 'serializer', 'view', 'total'}
+        )
+        self.assertIn('desc="SQL (3)"', metrics['db'])
+
+        [line] = logs.output
+        record = json.loads(line.split(':', 2)[2])
+        self.assertEqual(record['path'], '/api/v1/titles/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 3)
+        self.assertGreaterEqual(record['total_ms'], record['view_ms'])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,104 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+from reviews.models import Category, Review, Title, User
+
+from ..purge import NginxPurger
+
+
+class RecordingPurger:
+    """Тестовый бэкенд сброса: запоминает пути вместо запросов к nginx."""
+    paths = []
+
+    def purge(self, paths):
+        self.paths.extend(paths)
+
+
+@override_settings(
+    CACHE_PURGE_BACKEND='api.tests.test_shared_cache.RecordingPurger',
+    PROXY_CACHE_SECONDS=5, PROXY_CACHE_STALE_SECONDS=30
+)
+class SharedCacheTest(APITransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='user', email='user@ya.ru')
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.detail = f'/api/v1/titles/{self.title.pk}/'
+        RecordingPurger.paths.clear()
+
+    def test_headers(self):
+        for url in ('/api/v1/titles/', self.detail, '/api/v1/genres/',
+                    '/api/v1/titles/top/', '/api/v1/titles/0/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response['Cache-Control'],
+                    'public, max-age=0, s-maxage=5, '
+                    'stale-while-revalidate=30'
+                )
+                self.assertIn('Authorization', response['Vary'])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.detail)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=0')
+        self.assertIn('Authorization', response['Vary'])
+        response = self.client.post('/api/v1/titles/', {}, format='json')
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_writes_purge_affected_paths(self):
+        Review.objects.create(
+            title=self.title, author=self.user, text='Отзыв', score=5
+        )
+        self.assertEqual(RecordingPurger.paths, [
+            '/api/v1/titles/', self.detail, f'{self.detail}stats/',
+            '/api/v1/titles/top/',
+        ])
+        RecordingPurger.paths.clear()
+        Category.objects.create(name='Фильм', slug='movie')
+        self.assertEqual(
+            RecordingPurger.paths,
+            ['/api/v1/categories/', '/api/v1/titles/', '/api/v1/titles/top/']
+        )
+
+
+class PurgeHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # noqa: N802
+        self.server.paths.append(self.path)
+        self.send_response(404 if self.path.endswith('/0/') else 200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class NginxPurgerTest(APITransactionTestCase):
+    """Вместо nginx запросы обновления принимает локальный HTTP-сервер."""
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), PurgeHandler)
+        self.server.paths = []
+        threading.Thread(target=self.server.serve_forever).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_refresh_requests(self):
+        url = f'http://127.0.0.1:{self.server.server_port}'
+        with override_settings(CACHE_PURGE_URL=url):
+            NginxPurger().purge(['/api/v1/titles/', '/api/v1/titles/0/'])
+        deadline = time.monotonic() + 5
+        while len(self.server.paths) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(
+            sorted(self.server.paths),
+            ['/api/v1/titles/', '/api/v1/titles/0/']
+        )
+
+        with override_settings(CACHE_PURGE_URL=''):
+            NginxPurger().purge(['/api/v1/genres/'])
+        self.assertNotIn('/api/v1/genres/', self.server.paths)
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from ..views import TitlesViewSet
+
+
+class SparseFieldsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('drama', 'comedy')
+        ]
+        self.title = Title.objects.create(
+            name='Фильм', year=2000, description='Описание',
+            category=category
+        )
+        self.title.genre.set(genres)
+        user = User.objects.create(username='user', email='user@ya.ru')
+        self.review = Review.objects.create(
+            title=self.title, author=user, text='Отзыв', score=8
+        )
+        Comment.objects.create(review=self.review, author=user, text='Да')
+        self.titles_url = '/api/v1/titles/'
+        self.title_url = f'/api/v1/titles/{self.title.pk}/'
+        self.reviews_url = f'{self.title_url}reviews/'
+        self.comments_url = f'{self.reviews_url}{self.review.pk}/comments/'
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, ' '.join(
+            query['sql'] for query in context.captured_queries
+        )
+
+    def test_fields_trim_payload_and_select(self):
+        data, sql = self.get(f'{self.titles_url}?fields=id,name,rating')
+        self.assertEqual(
+            data['results'],
+            [{'id': self.title.pk, 'rating': 8, 'name': 'Фильм'}]
+        )
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('reviews_genre', sql)
+        self.assertNotIn('reviews_category', sql)
+
+        data, sql = self.get(f'{self.title_url}?fields=name')
+        self.assertEqual(data, {'name': 'Фильм'})
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('reviews_genre', sql)
+
+        data, sql = self.get(f'{self.reviews_url}?fields=score,author')
+        self.assertEqual(data['results'], [{'author': 'user', 'score': 8}])
+        self.assertNotIn('"text"', sql)
+
+        data, sql = self.get(f'{self.comments_url}?fields=text')
+        self.assertEqual(data['results'], [{'text': 'Да'}])
+        self.assertNotIn('reviews_user', sql)
+
+    def test_expand(self):
+        data, _ = self.get(self.title_url)
+        self.assertEqual(data['category'], {'name': 'Фильм', 'slug': 'movie'})
+
+        data, sql = self.get(
+            f'{self.title_url}?fields=category,genre&expand='
+        )
+        self.assertEqual(
+            data, {'category': 'movie', 'genre': ['drama', 'comedy']}
+        )
+        self.assertNotIn('"reviews_genre"."name"', sql)
+        self.assertNotIn('"reviews_category"."name"', sql)
+
+        data, _ = self.get(
+            f'{self.title_url}?fields=category,genre&expand=genre'
+        )
+        self.assertEqual(data['category'], 'movie')
+        self.assertEqual(data['genre'][0], {'name': 'drama', 'slug': 'drama'})
+
+    def test_fast_list_matches_serializers(self):
+        for query in ('fields=id,genre', 'expand=', 'expand=category',
+                      'fields=year,category&expand=category'):
+            url = f'{self.titles_url}?{query}'
+            with self.subTest(query=query):
+                fast = self.client.get(url).content
+                cache.clear()
+                with mock.patch.object(
+                        TitlesViewSet, 'fast_serializer', None):
+                    regular = self.client.get(url).content
+                self.assertEqual(fast, regular)
+
+    def test_unknown_names(self):
+        for url in (f'{self.titles_url}?fields=id,password',
+                    f'{self.titles_url}?expand=author',
+                    f'{self.reviews_url}?expand=title'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Comment, Review, Title, User
+
+
+class TitleIncludeTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.url = f'/api/v1/titles/{self.title.pk}/'
+
+    def add_reviews(self, count, comments):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru'
+            )
+            review = Review.objects.create(
+                title=self.title, author=author, text=f'Отзыв {number}',
+                score=5
+            )
+            for _ in range(comments):
+                Comment.objects.create(
+                    review=review, author=author, text='Ответ'
+                )
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, len(context.captured_queries)
+
+    def test_queries_do_not_grow(self):
+        params = {'include': 'reviews', 'comment_limit': 2}
+        self.add_reviews(1, 1)
+        _, few = self.get(params)
+        self.add_reviews(4, 3)
+        response, many = self.get(params)
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data['reviews']), 5)
+
+    def test_limits(self):
+        self.add_reviews(4, 3)
+        response, _ = self.get({'include': 'reviews', 'review_limit': 2})
+        reviews = response.data['reviews']
+        self.assertEqual(
+            [review['text'] for review in reviews], ['Отзыв 3', 'Отзыв 2']
+        )
+        self.assertEqual(reviews[0]['comments_count'], 3)
+        self.assertNotIn('comments', reviews[0])
+
+        response, _ = self.get({'include': 'reviews', 'comment_limit': 2})
+        first = Review.objects.get(text='Отзыв 3').comments.order_by('id')
+        self.assertEqual(
+            [comment['id'] for comment in response.data['reviews'][0][
+                'comments']],
+            list(first.values_list('id', flat=True)[:2])
+        )
+
+        for params in ({'include': 'comments'}, {'review_limit': 21},
+                       {'comment_limit': 'x'}):
+            response = self.client.get(self.url, {'include': 'reviews',
+                                                  **params})
+            self.assertEqual(response.status_code, 400)
+
+    def test_comments_count_and_etag(self):
+        self.add_reviews(1, 2)
+        review = Review.objects.get()
+        self.assertEqual(review.comments_count, 2)
+        response, _ = self.get({'include': 'reviews'})
+        etag = response['ETag']
+
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Ещё'
+        )
+        review.refresh_from_db()
+        self.assertEqual(review.comments_count, 3)
+        review.text = 'Правка'
+        review.save()
+        self.assertEqual(Review.objects.get().comments_count, 3)
+        comment.delete()
+        self.assertEqual(Review.objects.get().comments_count, 2)
+
+        response, _ = self.get({'include': 'reviews'})
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['reviews'][0]['comments_count'], 2)
+
+    def test_review_endpoints_keep_shape(self):
+        self.add_reviews(1, 1)
+        url = f'{self.url}reviews/'
+        review = self.client.get(url).data['results'][0]
+        self.assertNotIn('comments_count', review)
+        review = self.client.get(f'{url}{review["id"]}/').data
+        self.assertNotIn('comments_count', review)
@@ -0,0 +1,56 @@
+from rest_framework.test import APITestCase
+from reviews.models import Review, Title, User
+
+
+class TitleStatsTest(APITestCase):
+
+    def setUp(self):
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.url = f'/api/v1/titles/{self.title.pk}/stats/'
+        for number, score in enumerate((8, 8, 2)):
+            user = User.objects.create(
+                username=f'user{number}', email=f'user{number}@ya.ru'
+            )
+            self.review = Review.objects.create(
+                title=self.title, author=user, text='Отзыв', score=score
+            )
+
+    def test_stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['reviews_count'], 3)
+        self.assertEqual(
+            response.data['scores'],
+            {
+                str(score): {8: 2, 2: 1}.get(score, 0)
+                for score in range(1, 11)
+            }
+        )
+        self.assertEqual(
+            response.json()['last_review'],
+            self.review.pub_date.isoformat().replace('+00:00', 'Z')
+        )
+
+    def test_single_row_read(self):
+        self.client.get(self.url)
+        # Версия произведения для ETag и строка статистики.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.review.delete()
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['scores']['2'], 0)
+
+    def test_unknown_title(self):
+        response = self.client.get(
+            f'/api/v1/titles/{self.title.pk + 1}/stats/'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,94 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from reviews.models import Category, Genre, Review, Title, User
+
+
+@override_settings(RANKING_PRIOR_MEAN=5.0, RANKING_PRIOR_VOTES=2)
+class TopTitlesTest(APITestCase):
+    url = '/api/v1/titles/top/'
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@ya.ru')
+            for number in range(4)
+        ]
+        self.drama = Genre.objects.create(name='Драма', slug='drama')
+        self.comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        self.movie = Category.objects.create(name='Фильм', slug='movie')
+        self.single = self.title('Одна оценка', 2000, [10])
+        self.popular = self.title('Много оценок', 2001, [9, 9, 9, 9])
+        self.popular.genre.set([self.drama])
+        self.average = self.title('Средний', 2000, [6, 6])
+        self.average.genre.set([self.drama, self.comedy])
+        self.average.category = self.movie
+        self.average.save()
+        self.title('Без отзывов', 2000, [])
+
+    def title(self, name, year, scores):
+        title = Title.objects.create(name=name, year=year)
+        for user, score in zip(self.users, scores):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score
+            )
+        return title
+
+    def top(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [entry['title']['name'] for entry in response.data['results']]
+
+    def test_bayesian_order(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 3)
+        # (36 + 2 * 5) / (4 + 2) против (10 + 2 * 5) / (1 + 2).
+        self.assertEqual(
+            [entry['score'] for entry in response.json()['results']],
+            [7.67, 6.67, 5.5]
+        )
+        self.assertEqual(
+            self.top(), ['Много оценок', 'Одна оценка', 'Средний']
+        )
+        self.assertEqual(
+            response.data['results'][0]['title']['genre'],
+            [{'name': 'Драма', 'slug': 'drama'}]
+        )
+
+    def test_filters(self):
+        self.assertEqual(self.top(genre='drama'), ['Много оценок', 'Средний'])
+        self.assertEqual(self.top(genre='comedy'), ['Средний'])
+        self.assertEqual(self.top(category='movie'), ['Средний'])
+        self.assertEqual(
+            self.top(genre='drama', category='movie', year=2000),
+            ['Средний']
+        )
+        self.assertEqual(self.top(year=2000), ['Одна оценка', 'Средний'])
+        self.assertEqual(self.top(genre='horror'), [])
+        response = self.client.get(self.url, {'year': 'год'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_follows_reviews_and_titles(self):
+        Review.objects.create(
+            title=self.single, author=self.users[1], text='Отзыв', score=10
+        )
+        Review.objects.create(
+            title=self.single, author=self.users[2], text='Отзыв', score=10
+        )
+        self.assertEqual(self.top()[0], 'Одна оценка')
+        self.single.reviews.all().delete()
+        self.assertEqual(self.top(), ['Много оценок', 'Средний'])
+
+        self.average.genre.remove(self.drama)
+        self.assertEqual(self.top(genre='drama'), ['Много оценок'])
+        self.average.category = None
+        self.average.save()
+        self.assertEqual(self.top(category='movie'), [])
+        self.comedy.delete()
+        self.assertEqual(self.top(genre='comedy'), [])
+
+    def test_limit(self):
+        response = self.client.get(self.url, {'limit': 1, 'offset': 1})
+        self.assertEqual(
+            [entry['title']['name'] for entry in response.data['results']],
+            ['Одна оценка']
+        )
@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewsViewSet, TitlesViewSet, UserViewSet, get_token,
-                    signup)
+from .views import (ActivityViewSet, CategoryViewSet, CommentViewSet,
+                    GenreViewSet, ReviewsViewSet, TitlesViewSet, UserViewSet,
+                    export, get_token, signup)
 
 app_name = 'api'
 
@@ -23,12 +23,14 @@ ver_1.register(
 )
 ver_1.register('categories', CategoryViewSet, basename='categories')
 ver_1.register('genres', GenreViewSet, basename='genres')
+ver_1.register('activity', ActivityViewSet, basename='activity')
 
 ver_1_auth_patterns = [
     path('token/', get_token, name='token'),
     path('signup/', signup, name='signup'),
 ]
 urlpatterns = [
+    path('v1/export/<slug:name>.<slug:extension>', export, name='export'),
     path('v1/', include(ver_1.urls)),
     path('v1/auth/', include(ver_1_auth_patterns)),
 ]
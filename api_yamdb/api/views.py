@@ -1,27 +1,44 @@
 import random
 
-from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import (Exists, OuterRef, Prefetch, Subquery,
+                              prefetch_related_objects)
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework import filters, mixins, permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.aggregates import rebuild_title_stats
+from reviews.export import CSV_TABLES, csv_lines, ndjson_lines
+from reviews.models import (Activity, Category, Comment, Genre, Review, Title,
+                            TitleRanking, TitleStats, User)
+from reviews.outbox import enqueue_email
 
-from .filters import TitleFilter
-from .mixins import CreateListDestroy
+from .authentication import issue_access_token
+from .fast_serializers import ValuesSerializer
+from .filters import TitleFilter, TitleRankingFilter
+from .mixins import (BulkCreateMixin, CachedListMixin, ConditionalGetMixin,
+                     CreateListDestroy, FastDeleteMixin, FastListMixin,
+                     NestedParentMixin, ReplicaReadMixin, SharedCacheMixin,
+                     SparseFieldsMixin, TimedViewMixin)
+from .pagination import (ActivityPagination, CommentPagination,
+                         ReviewPagination, TopTitlesPagination)
 from .permissions import (AdminOrReadOnly, AnyReadOnly, IsAdminOrSuperuser,
                           IsAuthorAndStaffOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, GetTokenSerializer,
-                          ReviewSerializer, SignUpSerializer,
-                          TitlePostSerializer, TitleSerializer, UserSerializer)
+from .serializers import (ActivitySerializer, CategorySerializer,
+                          CommentSerializer, GenreSerializer,
+                          GetTokenSerializer, IncludedReviewSerializer,
+                          ReviewBulkSerializer, ReviewSerializer,
+                          ReviewWithCommentsSerializer, SignUpSerializer,
+                          TitlePostSerializer, TitleRankingSerializer,
+                          TitleSerializer, TitleStatsSerializer,
+                          UserSerializer)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TimedViewMixin, ReplicaReadMixin, FastDeleteMixin,
+                  viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdminOrSuperuser, )
@@ -35,7 +52,8 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated, ]
     )
     def me(self, request, *args, **kwargs):
-        user = request.user
+        # request.user может быть собран из claims токена без полей профиля.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
             serializer = UserSerializer(user)
             return Response(serializer.data)
@@ -51,14 +69,14 @@ def signup(request):
     serializer.is_valid(raise_exception=True)
     code = random.randint(100000, 999999)
     email = request.data['email']
-    send_mail(
-        'Код подтверждения YaMDb',
-        f'Ваш код подтверждения: {code}',
-        settings.CREW_EMAIL,
-        [f'{email}'],
-        fail_silently=False,
-    )
-    serializer.save(confirmation_code=code)
+    # Письмо отправит команда send_emails; запрос не ждёт почтовый сервер.
+    with transaction.atomic():
+        serializer.save(confirmation_code=code)
+        enqueue_email(
+            'Код подтверждения YaMDb',
+            f'Ваш код подтверждения: {code}',
+            email,
+        )
     return Response(serializer.data)
 
 
@@ -67,14 +85,35 @@ def get_token(request):
     serializer = GetTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = get_object_or_404(User, username=request.data['username'])
-    token = RefreshToken.for_user(user)
+    token = issue_access_token(user)
     return Response({
         'username': request.data['username'],
-        'token': str(token.access_token)
+        'token': str(token)
     })
 
 
-class GenreViewSet(CreateListDestroy):
+@api_view(['GET'])
+@permission_classes([IsAdminOrSuperuser])
+def export(request, name, extension):
+    """Выгрузка каталога: titles.ndjson или <таблица>.csv для import_csv."""
+    if extension == 'ndjson' and name == 'titles':
+        response = StreamingHttpResponse(
+            ndjson_lines(), content_type='application/x-ndjson'
+        )
+    elif extension == 'csv' and name in CSV_TABLES:
+        response = StreamingHttpResponse(
+            csv_lines(name), content_type='text/csv; charset=utf-8'
+        )
+    else:
+        raise Http404
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{extension}"'
+    )
+    return response
+
+
+class GenreViewSet(TimedViewMixin, ReplicaReadMixin, SharedCacheMixin,
+                   CachedListMixin, BulkCreateMixin, CreateListDestroy):
     search_fields = ('name',)
     lookup_field = 'slug'
     queryset = Genre.objects.all()
@@ -88,7 +127,8 @@ class GenreViewSet(CreateListDestroy):
         return super().get_permissions()
 
 
-class CategoryViewSet(CreateListDestroy):
+class CategoryViewSet(TimedViewMixin, ReplicaReadMixin, SharedCacheMixin,
+                      CachedListMixin, BulkCreateMixin, CreateListDestroy):
     search_fields = ('name',)
     lookup_field = 'slug'
     queryset = Category.objects.all()
@@ -97,55 +137,188 @@ class CategoryViewSet(CreateListDestroy):
     permission_classes = (AdminOrReadOnly,)
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        Avg('reviews__score')
+class TitlesViewSet(TimedViewMixin, ReplicaReadMixin, SharedCacheMixin,
+                    ConditionalGetMixin, SparseFieldsMixin, FastListMixin,
+                    BulkCreateMixin, FastDeleteMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('pk'))
     ).order_by('name')
     serializer_class = TitleSerializer
+    fast_serializer = ValuesSerializer(TitleSerializer)
     filter_backends = (DjangoFilterBackend,)
     filter_class = TitleFilter
     permission_classes = (AdminOrReadOnly,)
+    conditional_actions = ('retrieve', 'stats')
+    # ?include=reviews: (по умолчанию, максимум) для числа отзывов и
+    # комментариев к каждому из них.
+    review_limits = (5, 20)
+    comment_limits = (0, 10)
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return TitlePostSerializer
         return TitleSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        if 'include' not in request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional(self.get_compound, request, *args, **kwargs)
+
+    def limit_param(self, name, limits):
+        default, maximum = limits
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        if not value.isdigit() or int(value) > maximum:
+            raise ValidationError({name: [
+                f'Ожидается целое число от 0 до {maximum}'
+            ]})
+        return int(value)
+
+    def get_compound(self, request, *args, **kwargs):
+        """Произведение с первыми отзывами и их первыми комментариями.
+
+        Число запросов не зависит от числа отзывов и комментариев:
+        отзывы читаются одним запросом с LIMIT, комментарии — одним
+        запросом с коррелированным подзапросом LIMIT на каждый отзыв.
+        Число комментариев отзыва хранится в Review.comments_count.
+        """
+        if request.query_params['include'] != 'reviews':
+            raise ValidationError({'include': [
+                'Поддерживается только include=reviews'
+            ]})
+        review_limit = self.limit_param('review_limit', self.review_limits)
+        comment_limit = self.limit_param('comment_limit', self.comment_limits)
+        title = self.get_object()
+        reviews = list(title.reviews.select_related('author').order_by(
+            '-pub_date', '-id'
+        )[:review_limit])
+        serializer_class = IncludedReviewSerializer
+        if comment_limit:
+            serializer_class = ReviewWithCommentsSerializer
+            first_ids = Comment.objects.filter(
+                review=OuterRef('review')
+            ).order_by('id').values('id')[:comment_limit]
+            prefetch_related_objects(reviews, Prefetch(
+                'comments',
+                queryset=Comment.objects.filter(
+                    pk__in=Subquery(first_ids)
+                ).select_related('author').order_by('id'),
+                to_attr='first_comments'
+            ))
+        data = self.get_serializer(title).data
+        data['reviews'] = serializer_class(
+            reviews, many=True, context=self.get_serializer_context()
+        ).data
+        return Response(data)
+
+    def get_version(self):
+        return Title.objects.filter(pk=self.kwargs['pk']).values_list(
+            'version', 'modified'
+        ).first()
+
+    @action(detail=True)
+    def stats(self, request, *args, **kwargs):
+        return self.conditional(self.get_stats, request, *args, **kwargs)
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+    def get_stats(self, request, pk=None):
+        # Строка статистики поддерживается сигналами отзывов; если её
+        # ещё нет, она собирается по отзывам один раз.
+        stats = TitleStats.objects.filter(title_id=pk).first()
+        if stats is None:
+            stats = next(iter(rebuild_title_stats([pk])), None)
+        if stats is None:
+            raise Http404
+        return Response(TitleStatsSerializer(stats).data)
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовскому рейтингу.
+
+        Строки reviews.TitleRanking читаются по индексу, начинающемуся
+        с жанра, в порядке рейтинга: сортировки всей выборки нет.
+        """
+        filterset = TitleRankingFilter(
+            request.query_params,
+            queryset=TitleRanking.objects.filter(reviews_count__gt=0),
+            request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        rankings = filterset.qs.select_related(
+            'title__category'
+        ).prefetch_related(
+            Prefetch('title__genre', queryset=Genre.objects.order_by('pk'))
+        ).order_by('-score', 'title')
+        paginator = TopTitlesPagination()
+        page = paginator.paginate_queryset(rankings, request, view=self)
+        return paginator.get_paginated_response(TitleRankingSerializer(
+            page, many=True, context=self.get_serializer_context()
+        ).data)
+
+
+class ReviewsViewSet(TimedViewMixin, ReplicaReadMixin, NestedParentMixin,
+                     ConditionalGetMixin, SparseFieldsMixin, FastListMixin,
+                     BulkCreateMixin, FastDeleteMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    fast_serializer = ValuesSerializer(ReviewSerializer)
+    bulk_serializer_class = ReviewBulkSerializer
     permission_classes = [IsAuthorAndStaffOrReadOnly]
+    pagination_class = ReviewPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+
+    def get_parent_queryset(self):
+        queryset = super().get_parent_queryset()
+        if self.action != 'create' or not self.request.user.is_authenticated:
+            return queryset
+        # Проверка «один отзыв на произведение» в том же запросе.
+        return queryset.annotate(user_reviewed=Exists(
+            Review.objects.filter(
+                title=OuterRef('pk'), author=self.request.user
+            )
+        ))
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all()
+        return self.parent.reviews.select_related('author')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if serializer.is_valid:
-            serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.parent)
 
+    def create(self, request, *args, **kwargs):
+        # Пакетная загрузка отзывов от имени других авторов — для админов.
+        if (isinstance(request.data, list)
+                and not IsAdminOrSuperuser().has_permission(request, self)):
+            self.permission_denied(request)
+        return super().create(request, *args, **kwargs)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def perform_bulk_create(self, serializer):
+        serializer.save(title=self.parent)
+
+
+class CommentViewSet(TimedViewMixin, ReplicaReadMixin, NestedParentMixin,
+                     ConditionalGetMixin, SparseFieldsMixin, FastListMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    fast_serializer = ValuesSerializer(CommentSerializer)
     permission_classes = [IsAuthorAndStaffOrReadOnly]
+    pagination_class = CommentPagination
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_select_related = ('title',)
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(
-            Review, title_id=title_id, id=review_id
-        )
-        return review.comments.all().order_by('id')
+        return self.parent.comments.select_related('author').order_by('id')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(
-            Review, title_id=title_id, id=review_id
-        )
-        user = get_object_or_404(User, username=self.request.user)
-        serializer.save(author=user, review=review)
+        serializer.save(author=self.request.user, review=self.parent)
+
+
+class ActivityViewSet(TimedViewMixin, ReplicaReadMixin, mixins.ListModelMixin,
+                      viewsets.GenericViewSet):
+    """Новые отзывы и комментарии по всем произведениям."""
+    queryset = Activity.objects.select_related('author', 'review', 'comment')
+    serializer_class = ActivitySerializer
+    permission_classes = (AnyReadOnly,)
+    pagination_class = ActivityPagination
@@ -24,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,6 +35,31 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Доля запросов с заголовком Server-Timing и строкой в логе api.timing.
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', default=0.01))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.purge': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -65,6 +92,53 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: DB_REPLICAS — через запятую хосты PostgreSQL
+# (для SQLite — пути к файлам). Безопасные запросы к API читают
+# с реплик; пользователь, который что-то записал, REPLICA_PIN_SECONDS
+# секунд читает с основной базы. Закрепление хранится в CACHES, поэтому
+# с несколькими воркерами нужен общий для них бэкенд кеша.
+REPLICA_DATABASES = []
+for number, location in enumerate(filter(None, os.getenv('DB_REPLICAS', default='').split(','))):
+    alias = f'replica{number + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST': location.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['api.db_routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=10))
+
+# Бэкенд кеша: LocMemCache — кеш одного процесса; чтобы воркеры gunicorn
+# делили кеш, укажите FileBasedCache (CACHE_LOCATION — каталог) или
+# DatabaseCache (CACHE_LOCATION — таблица, создаётся createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+LIST_CACHE_TIMEOUT = int(os.getenv('LIST_CACHE_TIMEOUT', default=60 * 60 * 24))
+
+# Микрокеш nginx для анонимных GET к произведениям, жанрам и категориям
+# (api.mixins.SharedCacheMixin, infra/nginx/default.conf): ответ свежий
+# PROXY_CACHE_SECONDS секунд, ещё PROXY_CACHE_STALE_SECONDS отдаётся
+# устаревшим, пока nginx обновляет его в фоне. После записи изменённые
+# пути обновляются через внутренний сервер nginx CACHE_PURGE_URL
+# (api.purge); пустой CACHE_PURGE_URL отключает обновление.
+PROXY_CACHE_SECONDS = int(os.getenv('PROXY_CACHE_SECONDS', default=5))
+PROXY_CACHE_STALE_SECONDS = int(os.getenv('PROXY_CACHE_STALE_SECONDS', default=30))
+CACHE_PURGE_BACKEND = os.getenv('CACHE_PURGE_BACKEND', default='api.purge.NginxPurger')
+CACHE_PURGE_URL = os.getenv('CACHE_PURGE_URL', default='')
+CACHE_PURGE_TIMEOUT = float(os.getenv('CACHE_PURGE_TIMEOUT', default=5))
+
+# Удаление пользователей, произведений и отзывов через API и админку
+# без загрузки зависимых строк (reviews.deletion): в PostgreSQL отзывы
+# и комментарии удаляет каскад внешних ключей (миграция 0011_db_cascades).
+FAST_DELETE = os.getenv('FAST_DELETE', default='False') == 'True'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,7 +177,11 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -114,10 +192,29 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Сколько секунд версия токена пользователя живёт в памяти процесса и
+# в кеше CACHES. Кеш в памяти процесса не видит изменений из других
+# воркеров, поэтому с LocMemCache версия хранится столько же, сколько
+# локальная копия: это и есть задержка отзыва токена.
+AUTH_VERSION_LOCAL_TIMEOUT = int(os.getenv('AUTH_VERSION_LOCAL_TIMEOUT', default=5))
+AUTH_VERSION_CACHE_TIMEOUT = int(os.getenv(
+    'AUTH_VERSION_CACHE_TIMEOUT',
+    default=AUTH_VERSION_LOCAL_TIMEOUT
+    if CACHES['default']['BACKEND'].endswith('LocMemCache')
+    else SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+))
+
 AUTH_USER_MODEL = 'reviews.User'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 SCOPE_MIN = 1
 SCOPE_MAX = 10
+
+# Рейтинг для подборок лучших произведений (titles/top/): средняя оценка
+# со сдвигом к RANKING_PRIOR_MEAN, как если бы у каждого произведения было
+# ещё RANKING_PRIOR_VOTES таких оценок. После изменения выполните
+# rebuild_aggregates.
+RANKING_PRIOR_MEAN = float(os.getenv('RANKING_PRIOR_MEAN', default=(SCOPE_MIN + SCOPE_MAX) / 2))
+RANKING_PRIOR_VOTES = int(os.getenv('RANKING_PRIOR_VOTES', default=10))
 CREW_EMAIL = 'from@yamdb.com'
@@ -0,0 +1,48 @@
+"""Строки ленты активности (reviews.models.Activity).
+
+Отзывы и комментарии, созданные через модели, попадают в ленту
+сигналами в той же транзакции. Загруженные пакетом в обход сигналов
+(import_csv, generate_data) добавляет backfill_activity одним
+INSERT ... SELECT на таблицу.
+"""
+from .models import Activity, Comment, Review
+
+
+def review_activity(review):
+    return Activity(
+        kind=Activity.REVIEW, pub_date=review.pub_date,
+        author_id=review.author_id, review_id=review.pk,
+    )
+
+
+def comment_activity(comment):
+    return Activity(
+        kind=Activity.COMMENT, pub_date=comment.pub_date,
+        author_id=comment.author_id, review_id=comment.review_id,
+        comment_id=comment.pk,
+    )
+
+
+def backfill_activity(connection):
+    """Добавляет в ленту отзывы и комментарии, которых в ней нет."""
+    activity = Activity._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {activity} '
+            '(kind, pub_date, author_id, review_id, comment_id) '
+            'SELECT %s, r.pub_date, r.author_id, r.id, NULL '
+            f'FROM {Review._meta.db_table} r WHERE NOT EXISTS ('
+            f'SELECT 1 FROM {activity} a '
+            'WHERE a.review_id = r.id AND a.comment_id IS NULL)',
+            [Activity.REVIEW]
+        )
+        reviews = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {activity} '
+            '(kind, pub_date, author_id, review_id, comment_id) '
+            'SELECT %s, c.pub_date, c.author_id, c.review_id, c.id '
+            f'FROM {Comment._meta.db_table} c WHERE NOT EXISTS ('
+            f'SELECT 1 FROM {activity} a WHERE a.comment_id = c.id)',
+            [Activity.COMMENT]
+        )
+        return reviews + cursor.rowcount
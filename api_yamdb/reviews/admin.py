@@ -1,5 +1,18 @@
+from django.conf import settings
 from django.contrib import admin
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.deletion import fast_delete
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, User)
+
+
+class FastDeleteAdmin(admin.ModelAdmin):
+    """Массовое удаление без загрузки зависимых строк при FAST_DELETE."""
+
+    def delete_queryset(self, request, queryset):
+        if settings.FAST_DELETE:
+            fast_delete(queryset)
+        else:
+            super().delete_queryset(request, queryset)
 
 
 class GenreAdmin(admin.ModelAdmin):
@@ -14,7 +27,7 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name', 'slug')
 
 
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(FastDeleteAdmin):
     list_display = (
         'pk',
         'name',
@@ -26,9 +39,24 @@ class TitleAdmin(admin.ModelAdmin):
     search_fields = ('name', 'year', 'genre', 'category')
 
 
-admin.site.register(User)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'to',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('to',)
+
+
+admin.site.register(User, FastDeleteAdmin)
 admin.site.register(Title, TitleAdmin)
-admin.site.register(Review)
+admin.site.register(Review, FastDeleteAdmin)
 admin.site.register(Comment)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Category, CategoryAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,229 @@
+from django.db import models, transaction
+from django.db.models import (Case, Count, DateTimeField, ExpressionWrapper, F,
+                              FloatField, Max, OuterRef, Subquery, Sum, Value,
+                              When)
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import Comment, Review, Title, TitleRanking, TitleStats
+
+REBUILD_CHUNK_SIZE = 1000
+
+
+def touch(queryset):
+    """Меняет версию и дату изменения объектов (валидаторы ETag)."""
+    return queryset.update(version=F('version') + 1, modified=Now())
+
+
+def apply_review_delta(title_id, score_delta, count_delta):
+    """Атомарно сдвигает сумму оценок и число отзывов произведения.
+
+    Средняя оценка считается в том же UPDATE целочисленным делением,
+    что совпадает с прежним int(Avg('reviews__score')). Версия
+    произведения растёт при любом изменении его отзывов. Строки
+    подборок лучших сдвигаются следующим UPDATE.
+    """
+    rating_sum = F('rating_sum') + score_delta
+    reviews_count = F('reviews_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        version=F('version') + 1,
+        modified=Now(),
+        rating_sum=rating_sum,
+        reviews_count=reviews_count,
+        rating=Case(
+            When(reviews_count=-count_delta, then=Value(None)),
+            default=rating_sum / reviews_count,
+            output_field=models.PositiveSmallIntegerField(),
+        ),
+    )
+    TitleRanking.objects.filter(title_id=title_id).update(
+        rating_sum=rating_sum,
+        reviews_count=reviews_count,
+        score=ExpressionWrapper(
+            TitleRanking.bayesian_score(rating_sum, reviews_count),
+            output_field=FloatField()
+        ),
+    )
+
+
+def apply_comment_delta(review_id, count_delta):
+    """Сдвигает число комментариев отзыва и меняет версии отзыва и его
+    произведения: комментарии видны в ответе произведения с
+    ?include=reviews.
+    """
+    Review.objects.filter(pk=review_id).update(
+        version=F('version') + 1,
+        modified=Now(),
+        comments_count=F('comments_count') + count_delta,
+    )
+    touch(Title.objects.filter(reviews=review_id))
+
+
+def rebuild_comment_counts(reviews):
+    """Пересчитывает число комментариев отзывов из queryset reviews."""
+    reviews.update(
+        version=F('version') + 1,
+        modified=Now(),
+        comments_count=Coalesce(Subquery(
+            Comment.objects.filter(review=OuterRef('pk')).order_by()
+            .values('review').annotate(count=Count('id')).values('count')
+        ), 0),
+    )
+    touch(Title.objects.filter(reviews__in=reviews))
+
+
+def apply_stats_delta(title_id, score_deltas, published=None,
+                      recount_last=False):
+    """Сдвигает счётчики оценок произведения: score_deltas = {оценка: n}.
+
+    published — дата нового отзыва; recount_last — дату последнего
+    отзыва нужно выбрать заново (отзыв удалён или перенесён). Если
+    строки статистики ещё нет, её соберёт rebuild_title_stats при
+    первом чтении. Вызывается после apply_review_delta, которая
+    блокирует строку произведения.
+    """
+    updates = {
+        'reviews_count': F('reviews_count') + sum(score_deltas.values()),
+    }
+    for score, delta in score_deltas.items():
+        if delta and score in TitleStats.SCORES:
+            field = TitleStats.score_field(score)
+            updates[field] = F(field) + delta
+    if recount_last:
+        updates['last_review'] = Subquery(
+            Review.objects.filter(title_id=OuterRef('title_id'))
+            .order_by('-pub_date').values('pub_date')[:1]
+        )
+    elif published is not None:
+        published = Value(published, output_field=DateTimeField())
+        updates['last_review'] = Greatest(
+            Coalesce('last_review', published), published
+        )
+    TitleStats.objects.filter(title_id=title_id).update(**updates)
+
+
+def rebuild_title_stats(title_ids):
+    """Пересчитывает статистику отзывов произведений с нуля.
+
+    Строки произведений блокируются, как и при изменении отзыва, чтобы
+    отзыв, сохранённый во время пересчёта, не потерялся.
+    """
+    with transaction.atomic():
+        stats = {
+            pk: TitleStats(title_id=pk)
+            for pk in Title.objects.select_for_update().filter(
+                pk__in=title_ids
+            ).values_list('pk', flat=True)
+        }
+        for row in (
+            Review.objects.filter(title_id__in=stats).order_by()
+            .values('title_id', 'score')
+            .annotate(reviews_count=Count('id'), last_review=Max('pub_date'))
+        ):
+            title_stats = stats[row['title_id']]
+            title_stats.reviews_count += row['reviews_count']
+            if row['score'] in TitleStats.SCORES:
+                setattr(
+                    title_stats, TitleStats.score_field(row['score']),
+                    row['reviews_count']
+                )
+            title_stats.last_review = max(filter(None, (
+                title_stats.last_review, row['last_review']
+            )))
+        TitleStats.objects.bulk_create(stats.values(), ignore_conflicts=True)
+        TitleStats.objects.bulk_update(stats.values(), [
+            field.name for field in TitleStats._meta.concrete_fields
+            if not field.primary_key
+        ])
+    return list(stats.values())
+
+
+def rebuild_title_ranking(title_ids):
+    """Пересобирает строки подборок лучших по текущим полям произведений.
+
+    Вызывается после пересчёта агрегатов и при изменении жанров,
+    категории или года произведения.
+    """
+    with transaction.atomic():
+        titles = list(
+            Title.objects.select_for_update().filter(pk__in=title_ids)
+            .values_list('pk', 'category_id', 'year', 'rating_sum',
+                         'reviews_count')
+        )
+        genres = {}
+        for title_id, genre_id in Title.genre.through.objects.filter(
+                title_id__in=[title[0] for title in titles]
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        TitleRanking.objects.filter(title_id__in=title_ids).delete()
+        TitleRanking.objects.bulk_create([
+            TitleRanking(
+                title_id=pk, genre_id=genre_id, category_id=category_id,
+                year=year, rating_sum=rating_sum, reviews_count=reviews_count,
+                score=TitleRanking.bayesian_score(rating_sum, reviews_count),
+            )
+            for pk, category_id, year, rating_sum, reviews_count in titles
+            for genre_id in [None, *genres.get(pk, ())]
+        ])
+
+
+def rebuild_title_aggregates(title_ids=None, chunk_size=REBUILD_CHUNK_SIZE):
+    """Пересчитывает агрегаты произведений с нуля, порциями по chunk_size.
+
+    Строки произведений блокируются на время пересчёта порции,
+    чтобы параллельные изменения отзывов не потерялись.
+    Список title_ids тоже делится на порции: в запрос попадает не больше
+    chunk_size id, а не весь список на каждую порцию.
+    Возвращает количество пересчитанных произведений.
+    """
+    if title_ids is None:
+        return _rebuild_chunks(Title.objects.all(), chunk_size)
+    title_ids = sorted(set(title_ids))
+    return sum(
+        _rebuild_chunks(
+            Title.objects.filter(pk__in=title_ids[start:start + chunk_size]),
+            chunk_size
+        )
+        for start in range(0, len(title_ids), chunk_size)
+    )
+
+
+def _rebuild_chunks(titles, chunk_size):
+    titles = titles.order_by('pk')
+    last_pk = 0
+    rebuilt = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                titles.select_for_update().filter(pk__gt=last_pk)
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            totals = {
+                row['title_id']: (row['rating_sum'], row['reviews_count'])
+                for row in Review.objects.filter(title_id__in=chunk)
+                .order_by().values('title_id')
+                .annotate(rating_sum=Sum('score'), reviews_count=Count('id'))
+            }
+            updated = []
+            for pk in chunk:
+                rating_sum, reviews_count = totals.get(pk, (0, 0))
+                updated.append(Title(
+                    pk=pk,
+                    version=F('version') + 1,
+                    modified=Now(),
+                    rating_sum=rating_sum,
+                    reviews_count=reviews_count,
+                    rating=(
+                        rating_sum // reviews_count if reviews_count else None
+                    ),
+                ))
+            Title.objects.bulk_update(
+                updated, Title.AGGREGATE_FIELDS + ('version', 'modified')
+            )
+            rebuild_title_stats(chunk)
+            rebuild_title_ranking(chunk)
+            rebuild_comment_counts(Review.objects.filter(title_id__in=chunk))
+        last_pk = chunk[-1]
+        rebuilt += len(chunk)
+    return rebuilt
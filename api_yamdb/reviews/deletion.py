@@ -0,0 +1,113 @@
+"""Быстрое удаление пользователей, произведений и отзывов (FAST_DELETE).
+
+Обычный delete() загружает в память все зависимые отзывы и комментарии
+и удаляет их порциями с сигналами. Здесь зависимые строки удаляет база:
+в PostgreSQL внешние ключи из DB_CASCADES объявлены ON DELETE CASCADE
+(миграция 0011_db_cascades), и удаление — один DELETE. В остальных базах
+зависимые таблицы очищаются снизу вверх запросами по подзапросу, тоже
+без загрузки строк.
+
+Сигналы post_delete не отправляются: агрегаты затронутых произведений
+и счётчики комментариев отзывов пересчитываются, их версии растут, а об
+удалённых объектах сообщает сигнал bulk_deleted.
+"""
+from django.db import connections, models, router, transaction
+
+from .aggregates import rebuild_comment_counts, rebuild_title_aggregates
+from .models import (Activity, Comment, GenreTitle, Review, Title,
+                     TitleRanking, TitleStats, User)
+from .signals import bulk_deleted
+
+# Внешние ключи с ON DELETE CASCADE в PostgreSQL: (модель, поле).
+# Каскад объявляют миграции (0011_db_cascades и следующие). Django не
+# управляет этим свойством: AlterField на таком поле пересоздаст
+# ограничение без каскада, и миграцию нужно дополнить тем же ALTER TABLE.
+DB_CASCADES = {
+    (Review, 'title'),
+    (Review, 'author'),
+    (Comment, 'review'),
+    (Comment, 'author'),
+    (Activity, 'review'),
+    (Activity, 'comment'),
+    (Activity, 'author'),
+    (TitleStats, 'title'),
+    (TitleRanking, 'title'),
+    (Title.genre.through, 'title'),
+    (GenreTitle, 'title'),
+    (User.groups.through, 'user'),
+    (User.user_permissions.through, 'user'),
+}
+
+
+def db_cascades(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def dependent_relations(model):
+    """Обратные связи на model, включая таблицы M2M."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if (field.one_to_many or field.one_to_one) and field.auto_created
+        and not field.concrete
+    ]
+
+
+def raw_delete(queryset, using):
+    """Удаляет строки queryset и зависимые от них без загрузки в память."""
+    for relation in dependent_relations(queryset.model):
+        field = relation.field
+        if (relation.related_model, field.name) in DB_CASCADES and (
+                db_cascades(using)):
+            continue
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{field.name}__in': queryset}
+        )
+        if relation.on_delete is models.CASCADE:
+            raw_delete(related, using)
+        elif relation.on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif relation.on_delete is not models.DO_NOTHING:
+            # PROTECT и прочее — обычным delete() с его проверками.
+            related.delete()
+    queryset._raw_delete(using)
+
+
+def affected_rows(queryset):
+    """(id произведений, id отзывов), чьи агрегаты и версии изменятся."""
+    model = queryset.model
+    if model is Title:
+        # Отзывы уходят вместе с произведением: пересчитывать нечего.
+        return set(), set()
+    if model is User:
+        reviews = Review.objects.filter(author__in=queryset)
+        comments = Comment.objects.filter(author__in=queryset).exclude(
+            review__in=reviews
+        )
+    elif model is Review:
+        reviews = queryset
+        comments = Comment.objects.none()
+    else:
+        raise ValueError(f'Быстрое удаление {model.__name__} не поддержано')
+    return (
+        set(reviews.order_by().values_list('title_id', flat=True)),
+        set(comments.order_by().values_list('review_id', flat=True)),
+    )
+
+
+def fast_delete(queryset):
+    """Удаляет объекты queryset; возвращает число удалённых."""
+    model = queryset.model
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        pks = list(queryset.values_list('pk', flat=True))
+        if not pks:
+            return 0
+        queryset = model._base_manager.using(using).filter(pk__in=pks)
+        title_ids, review_ids = affected_rows(queryset)
+        raw_delete(queryset, using)
+        if title_ids:
+            rebuild_title_aggregates(title_ids)
+        if review_ids:
+            rebuild_comment_counts(Review.objects.filter(pk__in=review_ids))
+        bulk_deleted.send(sender=model, pks=pks)
+    return len(pks)
@@ -0,0 +1,128 @@
+"""Потоковая выгрузка каталога в NDJSON и CSV.
+
+NDJSON — по строке на произведение с категорией, жанрами, рейтингом и
+отзывами. Произведения, их жанры и отзывы читаются тремя курсорами
+QuerySet.iterator(), упорядоченными по id произведения, и сливаются на
+лету, поэтому в памяти держатся только текущие строки, а не таблицы.
+
+CSV — по файлу на таблицу в формате import_csv: внешние ключи записаны
+id, агрегаты рейтинга не выгружаются (import_csv пересчитывает их при
+загрузке отзывов).
+"""
+import csv
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Category, Comment, Genre, Review, Title, User
+
+CHUNK_SIZE = 2000
+
+# Таблицы CSV в порядке загрузки import_csv: (модель, колонки).
+CSV_TABLES = {
+    'user': (User, ('id', 'username', 'email', 'role', 'bio',
+                    'first_name', 'last_name')),
+    'category': (Category, ('id', 'name', 'slug')),
+    'genre': (Genre, ('id', 'name', 'slug')),
+    'title': (Title, ('id', 'name', 'year', 'description', 'category')),
+    'genre_title': (Title.genre.through, ('id', 'title_id', 'genre_id')),
+    'review': (Review, ('id', 'title_id', 'text', 'author', 'score',
+                        'pub_date')),
+    'comment': (Comment, ('id', 'review_id', 'text', 'author',
+                          'pub_date')),
+}
+
+
+def related_rows(rows):
+    """Функция take(pk): строки rows с title_id == pk.
+
+    rows упорядочены по title_id (первый элемент), pk запрашиваются
+    по возрастанию; пропущенные группы отбрасываются.
+    """
+    groups = groupby(rows, key=itemgetter(0))
+    current = next(groups, None)
+
+    def take(pk):
+        nonlocal current
+        while current is not None and current[0] < pk:
+            current = next(groups, None)
+        if current is None or current[0] != pk:
+            return []
+        try:
+            return [row[1:] for row in current[1]]
+        finally:
+            current = next(groups, None)
+    return take
+
+
+def title_documents(chunk_size=CHUNK_SIZE):
+    """Произведения с жанрами и отзывами в виде словарей, по одному."""
+    genres = related_rows(
+        Title.genre.through.objects.order_by('title_id', 'genre_id')
+        .values_list('title_id', 'genre__name', 'genre__slug')
+        .iterator(chunk_size=chunk_size)
+    )
+    reviews = related_rows(
+        # Порядок совпадает с индексом review_title_pub_date_idx.
+        Review.objects.order_by('title_id', 'pub_date', 'id')
+        .values_list('title_id', 'id', 'author__username', 'text', 'score',
+                     'pub_date')
+        .iterator(chunk_size=chunk_size)
+    )
+    titles = Title.objects.order_by('pk').values_list(
+        'pk', 'name', 'year', 'description', 'category__name',
+        'category__slug', 'rating'
+    ).iterator(chunk_size=chunk_size)
+    for pk, name, year, description, category, slug, rating in titles:
+        yield {
+            'id': pk,
+            'name': name,
+            'year': year,
+            'description': description,
+            'category': (
+                None if slug is None else {'name': category, 'slug': slug}
+            ),
+            'genre': [
+                {'name': genre, 'slug': genre_slug}
+                for genre, genre_slug in genres(pk)
+            ],
+            'rating': rating,
+            'reviews': [
+                {
+                    'id': review_id, 'author': author, 'text': text,
+                    'score': score, 'pub_date': pub_date,
+                }
+                for review_id, author, text, score, pub_date in reviews(pk)
+            ],
+        }
+
+
+def ndjson_lines(chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for document in title_documents(chunk_size):
+        yield encoder.encode(document) + '\n'
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(table, chunk_size=CHUNK_SIZE):
+    model, columns = CSV_TABLES[table]
+    attnames = [model._meta.get_field(column).attname for column in columns]
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    rows = model.objects.order_by('pk').values_list(
+        *attnames
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield writer.writerow([
+            '' if value is None
+            else value.isoformat() if hasattr(value, 'isoformat')
+            else value
+            for value in row
+        ])
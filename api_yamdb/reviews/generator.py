@@ -0,0 +1,346 @@
+"""Синтетические данные для нагрузочного тестирования (generate_data).
+
+Популярность произведений и активность пользователей распределены по
+закону Ципфа: несколько произведений собирают большую часть отзывов и
+комментариев, несколько пользователей пишут большую часть из них.
+Данные детерминированы при одинаковых параметрах и seed.
+
+Отзывы и комментарии вставляются порциями через bulk_create; порции
+независимы (у каждой свой генератор случайных чисел и диапазон id),
+поэтому в PostgreSQL их пишут несколько процессов. Агрегаты рейтинга
+считаются в памяти и записываются вместе с порцией отзывов, строки
+подборок лучших и лента активности — после загрузки отзывов и
+комментариев.
+"""
+import random
+import time
+from itertools import accumulate
+from multiprocessing import get_all_start_methods, get_context
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from .activity import backfill_activity
+from .aggregates import (REBUILD_CHUNK_SIZE, rebuild_comment_counts,
+                         rebuild_title_ranking)
+from .models import Category, Comment, Genre, Review, Title, User
+
+BATCH_SIZE = 5000
+ZIPF_EXPONENT = 1.1
+PREFIX = 'gen'
+WORDS = (
+    'тихий', 'дон', 'мастер', 'море', 'вечер', 'город', 'сад', 'звезда',
+    'дорога', 'зима', 'огонь', 'песня', 'ночь', 'берег', 'ветер', 'лес',
+    'дом', 'сон', 'небо', 'река', 'память', 'остров', 'путь', 'свет',
+)
+# Оценки смещены к высоким, как в реальных отзывах.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 7, 9, 10, 8, 6)
+
+# Состояние для порций: в дочерние процессы попадает через fork.
+_state = {}
+
+
+def zipf_cum_weights(count, exponent):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def review_quotas(total, titles, users, exponent):
+    """Число отзывов на каждое произведение в порядке популярности.
+
+    Отзывы делятся пропорционально весам Ципфа; у произведения не
+    может быть больше отзывов, чем пользователей (unique_reviews).
+    """
+    if not titles:
+        return []
+    weights = [1 / rank ** exponent for rank in range(1, titles + 1)]
+    scale = total / sum(weights)
+    quotas = [min(users, int(weight * scale)) for weight in weights]
+    left = total - sum(quotas)
+    while left:
+        for rank, quota in enumerate(quotas):
+            if quota < users:
+                quotas[rank] += 1
+                left -= 1
+                if not left:
+                    break
+    return quotas
+
+
+def pick_authors(rng, count, user_ids, cum_weights):
+    """count разных авторов, чаще всего — самые активные пользователи."""
+    if count * 2 > len(user_ids):
+        excluded = set(rng.sample(user_ids, len(user_ids) - count))
+        return [pk for pk in user_ids if pk not in excluded]
+    authors = set()
+    for _ in range(4):
+        authors.update(rng.choices(
+            user_ids, cum_weights=cum_weights, k=count - len(authors)
+        ))
+        if len(authors) == count:
+            return sorted(authors)
+    # Хвост распределения добираем равномерно.
+    while len(authors) < count:
+        authors.add(rng.choice(user_ids))
+    return sorted(authors)
+
+
+def make_user(pk):
+    return User(
+        id=pk, username=f'{PREFIX}{pk}', email=f'{PREFIX}{pk}@yamdb.ru'
+    )
+
+
+def make_category(pk):
+    return Category(
+        id=pk, name=f'Категория {PREFIX}{pk}', slug=f'{PREFIX}-c{pk}'
+    )
+
+
+def make_genre(pk):
+    return Genre(id=pk, name=f'Жанр {PREFIX}{pk}', slug=f'{PREFIX}-g{pk}')
+
+
+def bulk_insert(model, objects, batch_size):
+    for start in range(0, len(objects), batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(objects[start:start + batch_size])
+
+
+def insert_reviews(task):
+    """Порция отзывов: task = (номер, [(title_id, первый id, число)])."""
+    index, plan = task
+    rng = random.Random(f'{_state["seed"]}:reviews:{index}')
+    reviews = []
+    titles = []
+    for title_id, first_pk, count in plan:
+        authors = pick_authors(
+            rng, count, _state['user_ids'], _state['user_weights']
+        )
+        scores = rng.choices(range(1, 11), weights=SCORE_WEIGHTS, k=count)
+        reviews.extend(
+            Review(
+                id=first_pk + offset, title_id=title_id, author_id=author_id,
+                score=score, text=text(rng, 8)
+            )
+            for offset, (author_id, score) in enumerate(zip(authors, scores))
+        )
+        titles.append(Title(
+            pk=title_id,
+            rating_sum=sum(scores),
+            reviews_count=count,
+            rating=sum(scores) // count if count else None,
+        ))
+    bulk_insert(Review, reviews, _state['batch_size'])
+    Title.objects.bulk_update(
+        titles, Title.AGGREGATE_FIELDS, batch_size=_state['batch_size']
+    )
+    return len(reviews)
+
+
+def insert_comments(task):
+    """Порция комментариев: task = (номер, первый id, число)."""
+    index, first_pk, count = task
+    rng = random.Random(f'{_state["seed"]}:comments:{index}')
+    plan = _state['review_plan']
+    titles = rng.choices(plan, cum_weights=_state['title_weights'], k=count)
+    authors = rng.choices(
+        _state['user_ids'], cum_weights=_state['user_weights'], k=count
+    )
+    comments = [
+        Comment(
+            id=first_pk + offset,
+            # Ранние отзывы произведения обсуждают чаще поздних.
+            review_id=review_pk + int(reviews * rng.random() ** 3),
+            author_id=author_id,
+            text=text(rng, 5),
+        )
+        for offset, ((_, review_pk, reviews), author_id)
+        in enumerate(zip(titles, authors))
+    ]
+    bulk_insert(Comment, comments, _state['batch_size'])
+    return len(comments)
+
+
+def run_tasks(function, tasks, workers):
+    if workers == 1:
+        return sum(map(function, tasks))
+    # Дочерние процессы открывают собственные соединения с базой.
+    connections.close_all()
+    with get_context('fork').Pool(workers) as pool:
+        return sum(pool.imap_unordered(function, tasks))
+
+
+def max_workers(requested):
+    """SQLite допускает одного писателя, а без fork нет общего _state."""
+    if connection.vendor == 'sqlite' or 'fork' not in get_all_start_methods():
+        return 1
+    return max(1, requested)
+
+
+class Generator:
+
+    def __init__(self, counts, seed=0, exponent=ZIPF_EXPONENT,
+                 batch_size=BATCH_SIZE, workers=1, log=None):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.workers = max_workers(workers)
+        self.log = log or (lambda message: None)
+
+    def timed(self, name, function, *args):
+        started = time.monotonic()
+        try:
+            return function(*args)
+        finally:
+            self.log(f'{name} in {time.monotonic() - started:.1f}s')
+
+    def create(self, model, make):
+        first = next_pk(model)
+        objects = [
+            make(pk) for pk in range(first, first + self.counts[model])
+        ]
+        bulk_insert(model, objects, self.batch_size)
+        return [obj.pk for obj in objects]
+
+    def create_titles(self, category_ids, genre_ids):
+        title_ids = self.create(Title, lambda pk: Title(
+            id=pk,
+            name=f'{text(self.rng, 2)} {pk}',
+            year=self.rng.randint(1950, 2022),
+            description=text(self.rng, 12),
+            category_id=(
+                self.rng.choice(category_ids) if category_ids else None
+            ),
+        ))
+        if genre_ids:
+            through = Title.genre.through
+            bulk_insert(through, [
+                through(title_id=title_id, genre_id=genre_id)
+                for title_id in title_ids
+                for genre_id in self.rng.sample(
+                    genre_ids, min(len(genre_ids), self.rng.randint(1, 3))
+                )
+            ], self.batch_size)
+        return title_ids
+
+    def rank_titles(self, title_ids):
+        for start in range(0, len(title_ids), REBUILD_CHUNK_SIZE):
+            rebuild_title_ranking(
+                title_ids[start:start + REBUILD_CHUNK_SIZE]
+            )
+        return len(title_ids)
+
+    def count_comments(self, title_ids):
+        for start in range(0, len(title_ids), REBUILD_CHUNK_SIZE):
+            rebuild_comment_counts(Review.objects.filter(
+                title_id__in=title_ids[start:start + REBUILD_CHUNK_SIZE]
+            ))
+        return len(title_ids)
+
+    def plan_reviews(self, title_ids, user_count):
+        """[(title_id, первый id отзыва, число отзывов)] по популярности."""
+        ranked = list(title_ids)
+        self.rng.shuffle(ranked)
+        quotas = review_quotas(
+            self.counts[Review], len(ranked), user_count, self.exponent
+        )
+        first_pk = next_pk(Review)
+        plan = []
+        for title_id, quota in zip(ranked, quotas):
+            plan.append((title_id, first_pk, quota))
+            first_pk += quota
+        return plan
+
+    def review_tasks(self, plan):
+        tasks = []
+        chunk = []
+        reviews = 0
+        for entry in plan:
+            chunk.append(entry)
+            reviews += entry[2]
+            if reviews >= self.batch_size:
+                tasks.append((len(tasks), chunk))
+                chunk, reviews = [], 0
+        if chunk:
+            tasks.append((len(tasks), chunk))
+        return tasks
+
+    def comment_tasks(self):
+        first_pk = next_pk(Comment)
+        return [
+            (index, first_pk + start,
+             min(self.batch_size, self.counts[Comment] - start))
+            for index, start in enumerate(
+                range(0, self.counts[Comment], self.batch_size)
+            )
+        ]
+
+    def check(self):
+        users, titles = self.counts[User], self.counts[Title]
+        if self.counts[Review] > users * titles:
+            raise ValueError(
+                'Отзывов больше, чем пар пользователь-произведение'
+            )
+        if self.counts[Comment] and not (self.counts[Review] and users):
+            raise ValueError('Для комментариев нужны отзывы и пользователи')
+
+    def prepare_users(self):
+        user_ids = self.create(User, make_user)
+        self.rng.shuffle(user_ids)
+        _state.update(
+            user_ids=user_ids,
+            user_weights=zipf_cum_weights(len(user_ids), self.exponent),
+        )
+        return len(user_ids)
+
+    def generate(self):
+        self.check()
+        _state.update(seed=self.seed, batch_size=self.batch_size)
+        self.timed('User', self.prepare_users)
+        category_ids = self.timed(
+            'Category', self.create, Category, make_category
+        )
+        genre_ids = self.timed('Genre', self.create, Genre, make_genre)
+        title_ids = self.timed(
+            'Title', self.create_titles, category_ids, genre_ids
+        )
+
+        plan = self.plan_reviews(title_ids, self.counts[User])
+        self.timed(
+            'Review', run_tasks, insert_reviews, self.review_tasks(plan),
+            self.workers
+        )
+        _state.update(
+            review_plan=[entry for entry in plan if entry[2]],
+            # Комментариев на отзыв тем больше, чем популярнее произведение.
+            title_weights=list(accumulate(
+                quota ** 2 for _, _, quota in plan if quota
+            )),
+        )
+        self.timed(
+            'Comment', run_tasks, insert_comments, self.comment_tasks(),
+            self.workers
+        )
+        _state.clear()
+        self.timed('TitleRanking', self.rank_titles, title_ids)
+        self.timed('Review.comments_count', self.count_comments, title_ids)
+        self.timed('Activity', backfill_activity, connection)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [User, Category, Genre, Title, Review,
+                                 Comment]):
+                cursor.execute(sql)
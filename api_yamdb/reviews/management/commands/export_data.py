@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.export import CHUNK_SIZE, CSV_TABLES, csv_lines, ndjson_lines
+
+
+class Command(BaseCommand):
+    help = 'Stream titles with reviews as NDJSON or tables as import_csv CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson'
+        )
+        parser.add_argument(
+            '--output', type=str,
+            help='NDJSON file (default: stdout)'
+        )
+        parser.add_argument(
+            '--path', type=str,
+            help='directory for <table>.csv files (CSV format)'
+        )
+        parser.add_argument(
+            '--table', action='append', dest='tables',
+            choices=tuple(CSV_TABLES),
+            help='export only the given table (repeatable, CSV format)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='rows fetched from the database at a time'
+        )
+
+    def write(self, path, lines):
+        written = 0
+        with open(path, 'wt', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
+                written += 1
+        return written
+
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
+        started = time.monotonic()
+
+        if kwargs['format'] == 'ndjson':
+            lines = ndjson_lines(chunk_size)
+            if not kwargs['output']:
+                for line in lines:
+                    self.stdout.write(line, ending='')
+                return
+            written = self.write(kwargs['output'], lines)
+        else:
+            path = kwargs['path']
+            if not path or not os.path.isdir(path):
+                raise CommandError(f'Нет такой директории: {path}')
+            written = sum(
+                # Заголовок CSV не считается.
+                self.write(
+                    os.path.join(path, f'{table}.csv'),
+                    csv_lines(table, chunk_size)
+                ) - 1
+                for table in kwargs['tables'] or CSV_TABLES
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {written} rows '
+            f'in {time.monotonic() - started:.1f}s.'
+        ))
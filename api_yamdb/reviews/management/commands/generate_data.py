@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.generator import BATCH_SIZE, ZIPF_EXPONENT, Generator
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+# Опция командной строки: (модель, число строк по умолчанию).
+COUNTS = {
+    'users': (User, 1000),
+    'categories': (Category, 10),
+    'genres': (Genre, 30),
+    'titles': (Title, 1000),
+    'reviews': (Review, 20000),
+    'comments': (Comment, 50000),
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, titles, reviews and comments'
+
+    def add_arguments(self, parser):
+        for name, (_, count) in COUNTS.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=count,
+                help=f'number of {name} to create'
+            )
+        parser.add_argument(
+            '--zipf', type=float, default=ZIPF_EXPONENT,
+            help='Zipf exponent of title popularity and user activity'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='rows per bulk insert'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='insert processes (PostgreSQL only, SQLite uses one)'
+        )
+
+    def handle(self, *args, **kwargs):
+        counts = {model: kwargs[name] for name, (model, _) in COUNTS.items()}
+        if any(count < 0 for count in counts.values()):
+            raise CommandError('Число строк не может быть отрицательным')
+        if kwargs['batch_size'] < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
+
+        generator = Generator(
+            counts,
+            seed=kwargs['seed'],
+            exponent=kwargs['zipf'],
+            batch_size=kwargs['batch_size'],
+            workers=kwargs['workers'],
+            log=self.stdout.write if kwargs['verbosity'] > 1 else None,
+        )
+        started = time.monotonic()
+        try:
+            generator.generate()
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' + ', '.join(
+                f'{kwargs[name]} {name}' for name in COUNTS
+            ) + f' in {time.monotonic() - started:.1f}s '
+            f'({generator.workers} workers).'
+        ))
@@ -1,8 +1,201 @@
 import csv
+import io
 import os
+import time
+from contextlib import contextmanager
+from itertools import islice
 
 from django.apps import apps
 from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+from reviews.activity import backfill_activity
+from reviews.aggregates import (REBUILD_CHUNK_SIZE, rebuild_comment_counts,
+                                rebuild_title_aggregates)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+DEFAULT_BATCH_SIZE = 5000
+
+# CSV-файлы, которые загружаются в автоматически созданные таблицы M2M.
+M2M_MODELS = {
+    'genre_title': Title.genre.through,
+}
+
+# Поля, по которым в CSV можно указать внешний ключ вместо id: колонка
+# называется <поле>__<ключ>, например author__username.
+NATURAL_KEYS = {
+    User: 'username',
+    Category: 'slug',
+    Genre: 'slug',
+}
+
+
+@contextmanager
+def keep_timestamps(fields):
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из CSV."""
+    patched = [
+        (field, field.auto_now, field.auto_now_add) for field in fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in patched:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in patched:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class BulkLoader:
+    """Потоковая загрузка строк CSV порциями через bulk_create или COPY.
+
+    Каждая порция вставляется в своей транзакции, поэтому после сбоя
+    загрузку можно продолжить с --resume: строки с уже загруженными id
+    пропускаются.
+    """
+
+    def __init__(self, model, fields, batch_size, use_copy=False,
+                 resume=False, log=None, lookups=None):
+        self.model = model
+        self.fields = fields
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.resume = resume
+        self.log = log
+        lookups = lookups or {}
+        self.id_maps = {
+            field: self.build_id_map(
+                field.related_model, lookups.get(field, 'pk')
+            )
+            for field in fields if field.is_relation
+        }
+        self.title_ids = set()
+        self.review_ids = set()
+
+    @staticmethod
+    def build_id_map(model, key):
+        """{значение key строкой: pk}; key — 'pk' или естественный ключ."""
+        return {
+            str(value): pk
+            for value, pk in model.objects.values_list(key, 'pk').iterator()
+        }
+
+    def loaded_pks(self):
+        if self.model._meta.pk not in self.fields:
+            raise CommandError('Для --resume в CSV нужна колонка id')
+        return {
+            str(pk) for pk in
+            self.model.objects.values_list('pk', flat=True).iterator()
+        }
+
+    def convert(self, field, value):
+        if value == '' and field.null:
+            return None
+        if field.is_relation:
+            try:
+                return self.id_maps[field][value]
+            except KeyError:
+                raise ValueError(
+                    f'{field.name}: нет объекта {field.related_model.__name__}'
+                    f' с ключом {value!r}'
+                )
+        return field.to_python(value)
+
+    def make_object(self, line, row):
+        try:
+            return self.model(**{
+                field.attname: self.convert(field, value)
+                for field, value in zip(self.fields, row)
+            })
+        except Exception as e:
+            raise CommandError(f'Строка {line}: {e}')
+
+    def rows(self, reader):
+        skip = self.loaded_pks() if self.resume else ()
+        pk_index = (
+            self.fields.index(self.model._meta.pk)
+            if self.model._meta.pk in self.fields else None
+        )
+        for line, row in enumerate(reader, start=2):
+            if pk_index is not None and row[pk_index] in skip:
+                continue
+            yield self.make_object(line, row)
+
+    def copy(self, objs):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            writer.writerow([
+                r'\N' if value is None else value
+                for value in (
+                    field.get_db_prep_save(getattr(obj, field.attname),
+                                           connection)
+                    for field in self.fields
+                )
+            ])
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in self.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(self.model._meta.db_table)}'
+                f" ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+
+    def insert(self, objs):
+        with transaction.atomic():
+            if self.use_copy:
+                self.copy(objs)
+            else:
+                self.model.objects.bulk_create(objs, self.batch_size)
+        if self.model is Review or self.model is Title.genre.through:
+            self.title_ids.update(obj.title_id for obj in objs)
+        elif self.model is Title:
+            # Строки подборок лучших создаются вместе с агрегатами.
+            self.title_ids.update(obj.pk for obj in objs if obj.pk)
+        elif self.model is Comment:
+            self.review_ids.update(obj.review_id for obj in objs)
+
+    def load(self, reader):
+        started = time.monotonic()
+        loaded = 0
+        rows = self.rows(reader)
+        while True:
+            objs = list(islice(rows, self.batch_size))
+            if not objs:
+                break
+            try:
+                self.insert(objs)
+            except DatabaseError as e:
+                raise CommandError(
+                    f'Ошибка после {loaded} загруженных строк: {e}. '
+                    'Повторите запуск с --resume.'
+                )
+            loaded += len(objs)
+            if self.log:
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.log(f'{loaded} rows, {loaded / elapsed:.0f} rows/s')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [self.model]):
+                cursor.execute(sql)
+        self.rebuild_aggregates()
+        return loaded
+
+    def rebuild_aggregates(self):
+        if self.title_ids:
+            rebuild_title_aggregates(self.title_ids)
+        review_ids = sorted(self.review_ids)
+        for start in range(0, len(review_ids), REBUILD_CHUNK_SIZE):
+            rebuild_comment_counts(Review.objects.filter(
+                pk__in=review_ids[start:start + REBUILD_CHUNK_SIZE]
+            ))
+        if self.model is Review or self.model is Comment:
+            backfill_activity(connection)
 
 
 class Command(BaseCommand):
@@ -10,42 +203,107 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--path', type=str, help="file path")
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='insert rows in batches with bulk_create'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='rows per batch in bulk mode'
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='load batches with COPY (PostgreSQL only, implies --bulk)'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='skip rows whose id is already loaded (implies --bulk)'
+        )
+
+    def get_model(self, path):
+        model_csv, _ = os.path.splitext(os.path.basename(path))
+        if model_csv.lower() in M2M_MODELS:
+            return M2M_MODELS[model_csv.lower()]
+        try:
+            return apps.get_model('reviews', model_csv.title())
+        except LookupError:
+            raise CommandError(f'Модели {model_csv.title()} не существует!')
+
+    def get_fields(self, model, fields_name):
+        """Поля колонок и {поле: естественный ключ} для колонок вида
+        <поле>__<ключ>; остальные внешние ключи записаны id.
+        """
+        model_fields = {}
+        for field in model._meta.concrete_fields:
+            model_fields[field.name] = field
+            model_fields[field.attname] = field
+            natural_key = field.is_relation and NATURAL_KEYS.get(
+                field.related_model
+            )
+            if natural_key:
+                model_fields[f'{field.name}__{natural_key}'] = field
+        fields = []
+        lookups = {}
+        for name in fields_name:
+            name = name.lower().replace(' ', '_')
+            if name not in model_fields:
+                raise CommandError(
+                    f'Поля {name} не существует в модели {model}'
+                )
+            field = model_fields[name]
+            if '__' in name:
+                lookups[field] = name.split('__', 1)[1]
+            fields.append(field)
+        return fields, lookups
+
+    def load_rows(self, model, fields, reader):
+        loaded = 0
+        for row in reader:
+            try:
+                obj = model()
+                for field, value in zip(fields, row):
+                    setattr(obj, field.attname, value)
+                obj.save()
+            except Exception as e:
+                raise CommandError(e)
+            loaded += 1
+        return loaded
 
     def handle(self, *args, **kwargs):
         path = kwargs['path']
 
-        if not os.path.exists(path):
+        if not path or not os.path.exists(path):
             raise CommandError(f'Нет такой директории: {path}')
+        if kwargs['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy поддерживается только в PostgreSQL')
+        if kwargs['batch_size'] < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
 
-        model_csv, _ = os.path.splitext(os.path.basename(path))
+        model = self.get_model(path)
+        started = time.monotonic()
 
-        try:
-            model = apps.get_model('reviews', model_csv.title())
-        except LookupError:
-            print(f'Модели {model_csv.title()} не существует!')
-
-        model_fields = [f.name for f in model._meta.fields]
-
-        with open(path, 'rt') as csv_file:
+        with open(path, 'rt', encoding='utf-8') as csv_file:
             reader = csv.reader(csv_file, delimiter=',')
-            fields_name = next(reader)
-            for i, _ in enumerate(fields_name):
-                fields_name[i] = fields_name[i].lower()
-                fields_name[i] = fields_name[i].replace(' ', '_')
-                if not fields_name[i] in model_fields:
-                    raise CommandError(
-                        f'Поля {fields_name[i]} не существует в модели {model}'
-                    )
-
-            for row in reader:
-                try:
-                    obj = model()
-                    for i, field in enumerate(row):
-                        setattr(obj, fields_name[i], field)
-                    obj.save()
-                except Exception as e:
-                    raise CommandError(e)
-
-        self.stdout.write(
-            self.style.SUCCESS('Loading CSV.')
-        )
+            fields, lookups = self.get_fields(model, next(reader))
+            bulk = kwargs['bulk'] or kwargs['copy'] or kwargs['resume']
+            if lookups and not bulk:
+                raise CommandError(
+                    'Колонки с username/slug поддерживаются только с --bulk'
+                )
+            with keep_timestamps(fields):
+                if bulk:
+                    loaded = BulkLoader(
+                        model, fields, kwargs['batch_size'],
+                        use_copy=kwargs['copy'], resume=kwargs['resume'],
+                        log=self.stdout.write if kwargs['verbosity'] > 1
+                        else None,
+                        lookups=lookups,
+                    ).load(reader)
+                else:
+                    loaded = self.load_rows(model, fields, reader)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Loading CSV. {loaded} rows in {elapsed:.1f}s '
+            f'({loaded / elapsed:.0f} rows/s).'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.aggregates import REBUILD_CHUNK_SIZE, rebuild_title_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized title aggregates from reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=REBUILD_CHUNK_SIZE,
+            help='titles per transaction'
+        )
+        parser.add_argument(
+            '--title', type=int, action='append', dest='title_ids',
+            help='rebuild only the given title id (repeatable)'
+        )
+
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
+
+        started = time.monotonic()
+        rebuilt = rebuild_title_aggregates(kwargs['title_ids'], chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt} titles '
+            f'in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.outbox import BATCH_SIZE, MAX_ATTEMPTS, send_batch
+
+POLL_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='emails sent over one connection'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=MAX_ATTEMPTS,
+            help='attempts before an email is marked as failed'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=POLL_INTERVAL,
+            help='seconds to wait when the outbox is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='drain due emails and exit instead of polling'
+        )
+
+    def send(self, batch_size, max_attempts):
+        try:
+            return send_batch(batch_size, max_attempts)
+        except Exception as e:
+            # Почтовый сервер недоступен: письма остаются в очереди.
+            self.stderr.write(f'Mail server error: {e!r}')
+            return None
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        if batch_size < 1:
+            raise CommandError('Размер порции должен быть больше нуля')
+        if kwargs['max_attempts'] < 1:
+            raise CommandError('Число попыток должно быть больше нуля')
+
+        total_sent = total_failed = 0
+        while True:
+            result = self.send(batch_size, kwargs['max_attempts'])
+            if result is not None:
+                sent, failed = result
+                total_sent += sent
+                total_failed += failed
+                if kwargs['verbosity'] > 1 and (sent or failed):
+                    self.stdout.write(f'{sent} sent, {failed} failed')
+            if result is None or result[0] + result[1] < batch_size:
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total_sent} emails, {total_failed} failed.'
+        ))
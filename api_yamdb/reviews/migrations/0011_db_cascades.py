@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:40
+
+from django.db import migrations
+
+# (таблица, колонка, таблица-цель) внешних ключей с ON DELETE CASCADE,
+# см. reviews.deletion.DB_CASCADES. Django не управляет этим свойством:
+# AlterField на этих полях пересоздаст ограничение без каскада, и такую
+# миграцию нужно дополнить повторным запуском set_cascades.
+FOREIGN_KEYS = (
+    ('reviews_review', 'title_id', 'reviews_title'),
+    ('reviews_review', 'author_id', 'reviews_user'),
+    ('reviews_comment', 'review_id', 'reviews_review'),
+    ('reviews_comment', 'author_id', 'reviews_user'),
+    ('reviews_titlestats', 'title_id', 'reviews_title'),
+    ('reviews_title_genre', 'title_id', 'reviews_title'),
+    ('reviews_genretitle', 'title_id', 'reviews_title'),
+    ('reviews_user_groups', 'user_id', 'reviews_user'),
+    ('reviews_user_user_permissions', 'user_id', 'reviews_user'),
+)
+
+
+def alter_foreign_keys(schema_editor, on_delete):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, column, target in FOREIGN_KEYS:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            for name, constraint in constraints.items():
+                if not constraint['foreign_key'] or (
+                        constraint['columns'] != [column]):
+                    continue
+                schema_editor.execute(
+                    f'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+                    f'ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+                    f'REFERENCES {target} (id){on_delete} '
+                    'DEFERRABLE INITIALLY DEFERRED'
+                )
+
+
+def set_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, ' ON DELETE CASCADE')
+
+
+def unset_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_cascades, unset_cascades),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FOREIGN_KEYS = (('reviews_titleranking', 'title_id', 'reviews_title'),)
+
+
+def alter_foreign_keys(schema_editor, on_delete):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, column, target in FOREIGN_KEYS:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            for name, constraint in constraints.items():
+                if not constraint['foreign_key'] or (
+                        constraint['columns'] != [column]):
+                    continue
+                schema_editor.execute(
+                    f'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+                    f'ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+                    f'REFERENCES {target} (id){on_delete} '
+                    'DEFERRABLE INITIALLY DEFERRED'
+                )
+
+
+def set_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, ' ON DELETE CASCADE')
+
+
+def unset_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, '')
+
+
+def create_rankings(apps, schema_editor):
+    # Тот же расчёт, что в TitleRanking.bayesian_score.
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    prior_votes = settings.RANKING_PRIOR_VOTES
+    prior_sum = prior_votes * settings.RANKING_PRIOR_MEAN
+    genres = {}
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+            'title_id', 'genre_id').iterator():
+        genres.setdefault(title_id, []).append(genre_id)
+    TitleRanking.objects.bulk_create((
+        TitleRanking(
+            title_id=pk, genre_id=genre_id, category_id=category_id,
+            year=year, rating_sum=rating_sum, reviews_count=reviews_count,
+            score=(rating_sum + prior_sum) / (reviews_count + prior_votes),
+        )
+        for pk, category_id, year, rating_sum, reviews_count
+        in Title.objects.values_list(
+            'pk', 'category_id', 'year', 'rating_sum', 'reviews_count'
+        ).iterator()
+        for genre_id in [None, *genres.get(pk, ())]
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_db_cascades'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Год выпуска')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score', models.FloatField(verbose_name='Рейтинг в подборках')),
+                ('category', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.Category', verbose_name='Категория')),
+                ('genre', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Genre', verbose_name='Жанр')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг произведения в подборках',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', '-score', 'title'], name='ranking_genre_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', 'category', '-score', 'title'], name='ranking_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', 'year', '-score', 'title'], name='ranking_year_score_idx'),
+        ),
+        migrations.RunPython(set_cascades, unset_cascades),
+        migrations.RunPython(create_rankings, migrations.RunPython.noop),
+    ]
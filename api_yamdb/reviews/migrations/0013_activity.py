@@ -0,0 +1,86 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FOREIGN_KEYS = (
+    ('reviews_activity', 'review_id', 'reviews_review'),
+    ('reviews_activity', 'comment_id', 'reviews_comment'),
+    ('reviews_activity', 'author_id', 'reviews_user'),
+)
+
+
+def alter_foreign_keys(schema_editor, on_delete):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for table, column, target in FOREIGN_KEYS:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+            for name, constraint in constraints.items():
+                if not constraint['foreign_key'] or (
+                        constraint['columns'] != [column]):
+                    continue
+                schema_editor.execute(
+                    f'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+                    f'ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+                    f'REFERENCES {target} (id){on_delete} '
+                    'DEFERRABLE INITIALLY DEFERRED'
+                )
+
+
+def set_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, ' ON DELETE CASCADE')
+
+
+def unset_cascades(apps, schema_editor):
+    alter_foreign_keys(schema_editor, '')
+
+
+def backfill(apps, schema_editor):
+    # Таблица только что создана: в ленту попадают все отзывы и
+    # комментарии.
+    schema_editor.execute(
+        'INSERT INTO reviews_activity '
+        '(kind, pub_date, author_id, review_id, comment_id) '
+        "SELECT 'review', pub_date, author_id, id, NULL FROM reviews_review"
+    )
+    schema_editor.execute(
+        'INSERT INTO reviews_activity '
+        '(kind, pub_date, author_id, review_id, comment_id) '
+        "SELECT 'comment', pub_date, author_id, review_id, id "
+        'FROM reviews_comment'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('review', 'Отзыв'), ('comment', 'Комментарий')], max_length=7, verbose_name='Тип')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('comment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Comment')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Review')),
+            ],
+            options={
+                'verbose_name': 'Активность',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['-pub_date', '-id'], name='activity_pub_date_idx'),
+        ),
+        migrations.RunPython(set_cascades, unset_cascades),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -35,6 +36,39 @@ class User(AbstractUser):
         max_length=200,
         null=True
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токена',
+        default=0,
+        editable=False
+    )
+
+    # Поля, которые попадают в claims токена: их изменение отзывает
+    # выданные токены (см. api.authentication).
+    TOKEN_FIELDS = ('username', 'role', 'is_staff', 'is_superuser',
+                    'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_values', None) or {}
+        if any(
+            field in loaded and loaded[field] != getattr(self, field)
+            for field in self.TOKEN_FIELDS
+        ):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            **loaded,
+            **{field: getattr(self, field) for field in self.TOKEN_FIELDS},
+        }
 
 
 class Category(models.Model):
@@ -83,7 +117,6 @@ class Title(models.Model):
     genre = models.ManyToManyField(
         Genre,
         blank=True,
-        db_index=True,
         related_name='genres',
         verbose_name='Жанр'
     )
@@ -92,18 +125,188 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
+        # Индекс по category — префикс title_category_year_name_idx.
+        db_index=False,
         verbose_name='Категория',
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=0,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    # Поля, которые поддерживаются сигналами отзывов (reviews.signals)
+    # и не должны перезаписываться при сохранении произведения.
+    AGGREGATE_FIELDS = ('rating_sum', 'reviews_count', 'rating')
 
     class Meta:
         ordering = ('name', 'category')
         verbose_name = 'Произведение. model Title'
+        indexes = [
+            # Список произведений сортируется по названию, фильтры —
+            # по категории и году (api.filters.TitleFilter).
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(
+                fields=['category', 'year', 'name'],
+                name='title_category_year_name_idx'
+            ),
+            models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name not in self.AGGREGATE_FIELDS
+                ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.name}, {self.category}', {str(self.year)}
 
 
+class TitleStats(models.Model):
+    """Распределение оценок и статистика отзывов произведения.
+
+    Строка поддерживается сигналами отзывов (reviews.signals), поэтому
+    статистика читается одним запросом без обхода отзывов. Счётчики
+    оценок — поля score_<оценка> от SCOPE_MIN до SCOPE_MAX.
+    """
+    SCORES = range(settings.SCOPE_MIN, settings.SCOPE_MAX + 1)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Произведение'
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0
+    )
+    last_review = models.DateTimeField(
+        verbose_name='Дата последнего отзыва',
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика произведения'
+
+    @staticmethod
+    def score_field(score):
+        return f'score_{score}'
+
+    @property
+    def scores(self):
+        return {
+            score: getattr(self, self.score_field(score))
+            for score in self.SCORES
+        }
+
+
+for score in TitleStats.SCORES:
+    TitleStats.add_to_class(
+        TitleStats.score_field(score),
+        models.PositiveIntegerField(f'Оценка {score}', default=0)
+    )
+
+
+class TitleRanking(models.Model):
+    """Байесовский рейтинг произведения для подборок лучших.
+
+    На произведение приходится строка без жанра (общая подборка) и по
+    строке на каждый его жанр; категория и год скопированы из
+    произведения. Поэтому подборка с любым сочетанием фильтров читается
+    по индексу, начинающемуся с жанра, в порядке убывания score.
+    Строки поддерживаются сигналами (reviews.signals).
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        db_index=False,
+        related_name='+',
+        verbose_name='Жанр'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        db_index=False,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    year = models.IntegerField(verbose_name='Год выпуска')
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0
+    )
+    score = models.FloatField(verbose_name='Рейтинг в подборках')
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения в подборках'
+        indexes = [
+            models.Index(
+                fields=['genre', '-score', 'title'],
+                name='ranking_genre_score_idx'
+            ),
+            models.Index(
+                fields=['genre', 'category', '-score', 'title'],
+                name='ranking_category_score_idx'
+            ),
+            models.Index(
+                fields=['genre', 'year', '-score', 'title'],
+                name='ranking_year_score_idx'
+            ),
+        ]
+
+    @staticmethod
+    def bayesian_score(rating_sum, reviews_count):
+        """Средняя оценка с RANKING_PRIOR_VOTES априорными оценками.
+
+        Принимает числа или выражения: тот же расчёт идёт в UPDATE.
+        """
+        prior_votes = settings.RANKING_PRIOR_VOTES
+        return (
+            (rating_sum + prior_votes * settings.RANKING_PRIOR_MEAN)
+            / (reviews_count + float(prior_votes))
+        )
+
+
 class GenreTitle(models.Model):
     """Cвязь жанра и произведения."""
     title = models.ForeignKey(
@@ -131,6 +334,8 @@ class Review(models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
+        # Индекс по title — префикс review_title_pub_date_idx.
+        db_index=False,
         related_name='reviews'
     )
     text = models.TextField()
@@ -159,6 +364,24 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+
+    # Счётчик поддерживается сигналами комментариев (reviews.signals)
+    # и не должен перезаписываться при сохранении отзыва.
+    AGGREGATE_FIELDS = ('comments_count',)
 
     class Meta:
         ordering = ['-pub_date']
@@ -168,6 +391,35 @@ class Review(models.Model):
                 fields=['author', 'title'],
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Агрегаты произведения пересчитываются в post_save,
+        # поэтому отзыв и рейтинг сохраняются в одной транзакции.
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name not in self.AGGREGATE_FIELDS
+                ]
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -180,6 +432,8 @@ class Comment(models.Model):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
+        # Индекс по review — префикс comment_review_id_idx.
+        db_index=False,
         related_name='comments'
     )
     text = models.TextField()
@@ -189,5 +443,107 @@ class Comment(models.Model):
         db_index=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'id'],
+                name='comment_review_id_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.author
+
+    def save(self, *args, **kwargs):
+        # Строка ленты активности добавляется в post_save: комментарий
+        # и она сохраняются в одной транзакции.
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Activity(models.Model):
+    """Лента новых отзывов и комментариев по всем произведениям.
+
+    Строка добавляется в транзакции создания отзыва или комментария
+    (reviews.signals) и удаляется вместе с ним. Дата и автор скопированы,
+    поэтому лента читается по индексу activity_pub_date_idx без
+    объединения и сортировки таблиц отзывов и комментариев.
+    """
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+    kind = models.CharField('Тип', max_length=7, choices=KIND_CHOICES)
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+
+    class Meta:
+        verbose_name = 'Активность'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='activity_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письма, ожидающие отправки командой send_emails."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField('Тема', max_length=200)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    to = models.EmailField('Получатель')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outgoing_email_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,121 @@
+"""Очередь исходящих писем.
+
+Представления только записывают письмо в таблицу в своей транзакции;
+отправляет их команда send_emails порциями через одно соединение с
+почтовым сервером. Неудачные попытки повторяются с экспоненциальной
+задержкой, после max_attempts письмо помечается как неотправленное.
+
+Порция забирается короткой транзакцией: next_attempt_at сдвигается на
+LEASE, и другие воркеры её не видят. Письма отправляются вне транзакции,
+результат каждого записывается второй короткой транзакцией. Если воркер
+упал посреди порции, через LEASE её письма снова станут доступны.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.CREW_EMAIL,
+        to=to,
+    )
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: 30 с, 1 мин, 2 мин... до часа."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_batch(batch_size):
+    """Забирает порцию писем, время попытки которых наступило.
+
+    Строки блокируются с SKIP LOCKED (где это поддерживается) только на
+    время переноса next_attempt_at на LEASE вперёд.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=OutgoingEmail.PENDING,
+                next_attempt_at__lte=timezone.now()
+            )[:batch_size]
+        )
+        lease_until = timezone.now() + LEASE
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=lease_until)
+    for email in emails:
+        email.next_attempt_at = lease_until
+    return emails
+
+
+def send_email(email, connection):
+    """Отправляет письмо; возвращает исключение или None."""
+    try:
+        EmailMessage(
+            email.subject, email.body, email.from_email, [email.to],
+            connection=connection
+        ).send()
+    except Exception as e:
+        return e
+    return None
+
+
+def record_attempt(email, error, max_attempts):
+    email.attempts += 1
+    if error is None:
+        email.status = OutgoingEmail.SENT
+        email.sent_at = timezone.now()
+    else:
+        email.last_error = repr(error)
+        if email.attempts >= max_attempts:
+            email.status = OutgoingEmail.FAILED
+        else:
+            email.next_attempt_at = (
+                timezone.now() + retry_delay(email.attempts)
+            )
+
+
+def send_batch(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Отправляет одну порцию писем, время попытки которых наступило.
+
+    Ошибка соединения с почтовым сервером засчитывается попыткой всем
+    письмам порции, которые не успели отправиться, и пробрасывается
+    дальше. Возвращает пару (отправлено, с ошибкой).
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+    errors = {}
+    connection_error = None
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                errors[email.pk] = send_email(email, connection)
+    except Exception as e:
+        connection_error = e
+    for email in emails:
+        record_attempt(
+            email, errors.get(email.pk, connection_error), max_attempts
+        )
+    OutgoingEmail.objects.bulk_update(emails, (
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'
+    ))
+    if connection_error is not None:
+        raise connection_error
+    sent = sum(email.status == OutgoingEmail.SENT for email in emails)
+    return sent, len(emails) - sent
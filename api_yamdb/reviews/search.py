@@ -0,0 +1,179 @@
+"""Полнотекстовый поиск по произведениям.
+
+В PostgreSQL у reviews_title есть колонка search_vector (tsvector) с
+GIN-индексом и триграммный GIN-индекс по name; в SQLite — виртуальная
+таблица FTS5 reviews_title_fts. В обоих случаях индекс обновляется
+триггерами базы, поэтому его не обходят ни save(), ни bulk_create.
+Колонка и таблица не описаны в модели Title: ORM о них не знает.
+"""
+import re
+
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+
+POSTGRESQL_INSTALL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE reviews_title ADD COLUMN IF NOT EXISTS search_vector '
+    'tsvector',
+    f"""
+    CREATE OR REPLACE FUNCTION reviews_title_search_vector() RETURNS trigger
+    AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('{SEARCH_CONFIG}',
+                                     coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector_update '
+    'ON reviews_title',
+    'CREATE TRIGGER reviews_title_search_vector_update '
+    'BEFORE INSERT OR UPDATE OF name, description ON reviews_title '
+    'FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector()',
+    'UPDATE reviews_title SET name = name WHERE search_vector IS NULL',
+    'CREATE INDEX IF NOT EXISTS reviews_title_search_idx '
+    'ON reviews_title USING gin (search_vector)',
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm_idx '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+)
+
+POSTGRESQL_UNINSTALL = (
+    'DROP INDEX IF EXISTS reviews_title_name_trgm_idx',
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector_update '
+    'ON reviews_title',
+    'DROP FUNCTION IF EXISTS reviews_title_search_vector()',
+    'ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_TRIGGERS = {
+    'reviews_title_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert
+        AFTER INSERT ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+    'reviews_title_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete
+        AFTER DELETE ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(
+                reviews_title_fts, rowid, name, description
+            ) VALUES ('delete', old.id, old.name, old.description);
+        END
+    """,
+    'reviews_title_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update
+        AFTER UPDATE OF name, description ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(
+                reviews_title_fts, rowid, name, description
+            ) VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO reviews_title_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+}
+
+SQLITE_CREATE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+
+def install_search_index(connection):
+    """Создаёт (или восстанавливает) поисковый индекс произведений.
+
+    Операция идемпотентна. В SQLite Django пересоздаёт таблицу при
+    изменении её схемы и теряет триггеры, поэтому функция вызывается
+    ещё и после каждого migrate.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRESQL_INSTALL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'reviews_title'"
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if set(SQLITE_TRIGGERS) <= existing:
+                return
+            cursor.execute(SQLITE_CREATE_TABLE)
+            for sql in SQLITE_TRIGGERS.values():
+                cursor.execute(sql)
+            cursor.execute(
+                "INSERT INTO reviews_title_fts(reviews_title_fts) "
+                "VALUES ('rebuild')"
+            )
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRESQL_UNINSTALL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP TABLE IF EXISTS reviews_title_fts')
+
+
+def fts5_query(query):
+    """Превращает ввод пользователя в запрос FTS5 по префиксам слов."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_titles(queryset, query, connection):
+    """Фильтрует произведения по запросу и сортирует по релевантности.
+
+    PostgreSQL: совпадение по tsvector или триграммное сходство с
+    названием (терпимо к опечаткам), ранг — ts_rank + similarity.
+    SQLite: префиксный поиск FTS5 с рангом bm25.
+    """
+    if connection.vendor == 'postgresql':
+        matches = (
+            'reviews_title.id IN (SELECT id FROM reviews_title '
+            f"WHERE search_vector @@ plainto_tsquery('{SEARCH_CONFIG}', %s) "
+            'OR name %% %s)'
+        )
+        rank = RawSQL(
+            'ts_rank(reviews_title.search_vector, '
+            f"plainto_tsquery('{SEARCH_CONFIG}', %s)) "
+            '+ similarity(reviews_title.name, %s)',
+            (query, query),
+            output_field=FloatField()
+        )
+        return queryset.extra(
+            where=[matches], params=[query, query]
+        ).annotate(search_rank=rank).order_by('-search_rank', 'name')
+    if connection.vendor == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return queryset.none()
+        matches = (
+            'reviews_title.id IN (SELECT rowid FROM reviews_title_fts '
+            'WHERE reviews_title_fts MATCH %s)'
+        )
+        # bm25() тем меньше, чем выше релевантность; совпадение в
+        # названии весит больше, чем в описании.
+        rank = RawSQL(
+            'SELECT bm25(reviews_title_fts, 10.0, 1.0) FROM reviews_title_fts '
+            'WHERE reviews_title_fts MATCH %s '
+            'AND reviews_title_fts.rowid = reviews_title.id',
+            (match,),
+            output_field=FloatField()
+        )
+        return queryset.extra(where=[matches], params=[match]).annotate(
+            search_rank=rank
+        ).order_by('search_rank', 'name')
+    return queryset.filter(name__icontains=query)
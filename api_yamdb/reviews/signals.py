@@ -0,0 +1,176 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .activity import comment_activity, review_activity
+from .aggregates import (apply_comment_delta, apply_review_delta,
+                         apply_stats_delta, rebuild_title_aggregates,
+                         rebuild_title_ranking, touch)
+from .models import Activity, Category, Comment, Genre, Review, Title, User
+from .search import install_search_index
+
+SEARCH_MIGRATION = ('reviews', '0005_title_search')
+
+# bulk_create не отправляет post_save: пакетная вставка сообщает о новых
+# объектах этим сигналом (см. api.serializers.BulkListSerializer).
+bulk_created = Signal(providing_args=['objs'])
+# Удаление без post_delete (reviews.deletion.fast_delete).
+bulk_deleted = Signal(providing_args=['pks'])
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        review_activity(instance).save()
+        apply_review_delta(instance.title_id, instance.score, 1)
+        apply_stats_delta(
+            instance.title_id, {instance.score: 1}, instance.pub_date
+        )
+    elif loaded is None or 'score' not in loaded or 'title_id' not in loaded:
+        # Прежняя оценка неизвестна: пересчитываем произведение целиком.
+        rebuild_title_aggregates([instance.title_id])
+    elif loaded['title_id'] != instance.title_id:
+        apply_review_delta(loaded['title_id'], -loaded['score'], -1)
+        apply_stats_delta(
+            loaded['title_id'], {loaded['score']: -1}, recount_last=True
+        )
+        apply_review_delta(instance.title_id, instance.score, 1)
+        apply_stats_delta(
+            instance.title_id, {instance.score: 1}, instance.pub_date
+        )
+    else:
+        apply_review_delta(
+            instance.title_id, instance.score - loaded['score'], 0
+        )
+        if instance.score != loaded['score']:
+            apply_stats_delta(
+                instance.title_id, {instance.score: 1, loaded['score']: -1}
+            )
+    instance._loaded_values = {
+        **(loaded or {}),
+        'score': instance.score,
+        'title_id': instance.title_id,
+    }
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    title_id = loaded.get('title_id', instance.title_id)
+    score = loaded.get('score', instance.score)
+    apply_review_delta(title_id, -score, -1)
+    apply_stats_delta(title_id, {score: -1}, recount_last=True)
+
+
+@receiver(bulk_created, sender=Review)
+def reviews_bulk_created(sender, objs, **kwargs):
+    Activity.objects.bulk_create(review_activity(review) for review in objs)
+    totals = {}
+    for review in objs:
+        score, count, scores, published = totals.get(
+            review.title_id, (0, 0, {}, review.pub_date)
+        )
+        scores[review.score] = scores.get(review.score, 0) + 1
+        totals[review.title_id] = (
+            score + review.score, count + 1, scores,
+            max(published, review.pub_date)
+        )
+    for title_id, (score, count, scores, published) in totals.items():
+        apply_review_delta(title_id, score, count)
+        apply_stats_delta(title_id, scores, published)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, raw=False, **kwargs):
+    # Категория и год скопированы в строки подборок лучших.
+    if not raw:
+        rebuild_title_ranking([instance.pk])
+
+
+@receiver(bulk_created, sender=Title)
+def titles_bulk_created(sender, objs, **kwargs):
+    rebuild_title_ranking([title.pk for title in objs])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        comment_activity(instance).save()
+    apply_comment_delta(instance.review_id, int(created))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    apply_comment_delta(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    # Категория вложена в ответ произведения: его версия тоже меняется.
+    if not raw:
+        touch(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch(Title.objects.filter(genre=instance))
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, raw=False, **kwargs):
+    # Имя автора выводится в отзывах и комментариях, а их валидаторы
+    # ETag — версии произведения (отзывы) и отзыва (комментарии).
+    # _loaded_values ещё хранит прежнее имя: User.save обновляет его
+    # после post_save.
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if raw or created or loaded.get('username', instance.username) == (
+            instance.username):
+        return
+    touch(Review.objects.filter(comments__author=instance))
+    touch(Title.objects.filter(
+        Q(reviews__author=instance) | Q(reviews__comments__author=instance)
+    ))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action == 'pre_clear' and reverse:
+        # После очистки связей произведения жанра уже не найти.
+        instance._cleared_title_ids = list(
+            Title.objects.filter(genre=instance).values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch(Title.objects.filter(pk=instance.pk))
+        rebuild_title_ranking([instance.pk])
+    elif pk_set:
+        touch(Title.objects.filter(pk__in=pk_set))
+        rebuild_title_ranking(pk_set)
+    else:
+        title_ids = vars(instance).pop('_cleared_title_ids', [])
+        touch(Title.objects.filter(pk__in=title_ids))
+        rebuild_title_ranking(title_ids)
+
+
+def restore_search_index(sender, using, **kwargs):
+    """Восстанавливает триггеры поиска, потерянные при migrate в SQLite."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    if SEARCH_MIGRATION in applied:
+        install_search_index(connection)
@@ -0,0 +1,217 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from reviews.aggregates import (rebuild_title_aggregates,
+                                rebuild_title_ranking, rebuild_title_stats)
+from reviews.models import (Comment, Genre, Review, Title, TitleRanking,
+                            TitleStats, User)
+
+
+class TitleAggregatesTest(TestCase):
+
+    def setUp(self):
+        self.title = Title.objects.create(name='Title', year=2000)
+        self.first = User.objects.create(username='first', email='f@ya.ru')
+        self.second = User.objects.create(username='second', email='s@ya.ru')
+
+    def assert_aggregates(self, rating_sum, reviews_count, rating):
+        title = Title.objects.get(pk=self.title.pk)
+        self.assertEqual(
+            (title.rating_sum, title.reviews_count, title.rating),
+            (rating_sum, reviews_count, rating)
+        )
+
+    def test_create_update_delete(self):
+        review = Review.objects.create(
+            title=self.title, author=self.first, text='a', score=10
+        )
+        Review.objects.create(
+            title=self.title, author=self.second, text='b', score=5
+        )
+        self.assert_aggregates(15, 2, 7)
+
+        review.score = 1
+        review.save()
+        self.assert_aggregates(6, 2, 3)
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 3
+        review.save()
+        self.assert_aggregates(8, 2, 4)
+
+        review.delete()
+        self.assert_aggregates(5, 1, 5)
+
+    def test_cascade_delete_from_user(self):
+        Review.objects.create(
+            title=self.title, author=self.first, text='a', score=2
+        )
+        Review.objects.create(
+            title=self.title, author=self.second, text='b', score=4
+        )
+        self.second.delete()
+        self.assert_aggregates(2, 1, 2)
+        self.first.delete()
+        self.assert_aggregates(0, 0, None)
+
+    def test_title_save_keeps_aggregates(self):
+        title = Title.objects.get(pk=self.title.pk)
+        Review.objects.create(
+            title=self.title, author=self.first, text='a', score=8
+        )
+        title.name = 'Renamed'
+        title.save()
+        self.assert_aggregates(8, 1, 8)
+
+    def test_rebuild_command(self):
+        review = Review.objects.create(
+            title=self.title, author=self.first, text='a', score=9
+        )
+        Comment.objects.create(review=review, author=self.second, text='c')
+        Title.objects.update(rating_sum=0, reviews_count=0, rating=None)
+        Review.objects.update(comments_count=0)
+        call_command('rebuild_aggregates', chunk_size=1, stdout=None)
+        self.assert_aggregates(9, 1, 9)
+        self.assertEqual(Review.objects.get().comments_count, 1)
+
+    def test_rebuild_title_ids_in_chunks(self):
+        titles = [self.title] + [
+            Title.objects.create(name=f'Title {index}', year=2000)
+            for index in range(4)
+        ]
+        for title in titles:
+            Review.objects.create(
+                title=title, author=self.first, text='a', score=6
+            )
+        Title.objects.update(rating_sum=0, reviews_count=0, rating=None)
+        title_ids = [title.pk for title in reversed(titles)] + [0]
+        params = []
+
+        def record(execute, sql, sql_params, many, context):
+            if sql.startswith('SELECT') and 'FROM "reviews_title"' in sql:
+                params.append(len(sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(record):
+            self.assertEqual(rebuild_title_aggregates(title_ids, 2), 5)
+        # Порция id и last_pk, а не весь список на каждый запрос.
+        self.assertLessEqual(max(params), 3)
+        self.assertEqual(
+            set(Title.objects.values_list('rating_sum', 'reviews_count')),
+            {(6, 1)}
+        )
+
+
+class TitleStatsTest(TestCase):
+
+    def setUp(self):
+        self.title = Title.objects.create(name='Title', year=2000)
+        self.other = Title.objects.create(name='Other', year=2000)
+        self.users = [
+            User.objects.create(username=f'user{number}',
+                                email=f'user{number}@ya.ru')
+            for number in range(3)
+        ]
+
+    def stats(self, title=None):
+        return rebuild_title_stats([(title or self.title).pk])[0]
+
+    def assert_stats(self, title=None):
+        """Строка, поддержанная сигналами, совпадает с пересчётом."""
+        title = title or self.title
+        stats = TitleStats.objects.get(title=title)
+        expected = self.stats(title)
+        self.assertEqual(
+            (stats.reviews_count, stats.last_review, stats.scores),
+            (expected.reviews_count, expected.last_review, expected.scores)
+        )
+        return stats
+
+    def test_kept_current_by_review_changes(self):
+        self.stats()
+        self.stats(self.other)
+        reviews = [
+            Review.objects.create(
+                title=self.title, author=user, text='a', score=score
+            )
+            for user, score in zip(self.users, (10, 10, 3))
+        ]
+        stats = self.assert_stats()
+        self.assertEqual((stats.score_10, stats.score_3), (2, 1))
+        self.assertEqual(stats.last_review, reviews[-1].pub_date)
+
+        reviews[0].score = 1
+        reviews[0].save()
+        stats = self.assert_stats()
+        self.assertEqual((stats.score_10, stats.score_1), (1, 1))
+
+        reviews[-1].delete()
+        stats = self.assert_stats()
+        self.assertEqual(stats.last_review, reviews[1].pub_date)
+
+        reviews[1].title = self.other
+        reviews[1].save()
+        self.assertEqual(self.assert_stats().reviews_count, 1)
+        self.assertEqual(self.assert_stats(self.other).score_10, 1)
+
+    def test_built_on_first_read(self):
+        Review.objects.create(
+            title=self.title, author=self.users[0], text='a', score=7
+        )
+        self.assertFalse(TitleStats.objects.exists())
+        self.assertEqual(self.stats().score_7, 1)
+        self.title.delete()
+        self.assertFalse(TitleStats.objects.exists())
+
+
+class TitleRankingTest(TestCase):
+
+    def setUp(self):
+        self.title = Title.objects.create(name='Title', year=2000)
+        self.title.genre.set([
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('drama', 'comedy')
+        ])
+        for number, score in enumerate((10, 7, 4)):
+            user = User.objects.create(
+                username=f'user{number}', email=f'{number}@ya.ru'
+            )
+            self.review = Review.objects.create(
+                title=self.title, author=user, text='a', score=score
+            )
+
+    def rankings(self):
+        return sorted(
+            TitleRanking.objects.values_list(
+                'genre_id', 'category_id', 'year', 'rating_sum',
+                'reviews_count', 'score'
+            ),
+            key=lambda row: row[0] or 0
+        )
+
+    def test_incremental_matches_rebuild(self):
+        self.review.score = 1
+        self.review.save()
+        Review.objects.filter(score=7).delete()
+        incremental = self.rankings()
+        self.assertEqual(len(incremental), 3)
+        self.assertEqual(incremental[0][3:5], (11, 2))
+        rebuild_title_ranking([self.title.pk])
+        self.assertEqual(self.rankings(), incremental)
+
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_aggregates')
+        self.assertEqual(self.rankings(), incremental)
+
+    def test_reverse_genre_clear(self):
+        drama = Genre.objects.get(slug='drama')
+        # Как после добавления и удаления жанров: строки произведения
+        # пересобираются, а не только теряют строку жанра.
+        TitleRanking.objects.update(score=0)
+        drama.genres.clear()
+        cleared = self.rankings()
+        self.assertEqual(len(cleared), 2)
+        self.assertNotIn(drama.pk, [row[0] for row in cleared])
+        TitleRanking.objects.all().delete()
+        rebuild_title_ranking([self.title.pk])
+        self.assertEqual(self.rankings(), cleared)
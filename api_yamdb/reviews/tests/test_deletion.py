@@ -0,0 +1,96 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.deletion import fast_delete
+from reviews.models import Comment, Genre, Review, Title, TitleStats, User
+from reviews.signals import bulk_deleted
+
+
+class FastDeleteTest(TestCase):
+
+    def setUp(self):
+        self.genre = Genre.objects.create(name='Драма', slug='drama')
+        self.titles = [
+            Title.objects.create(name=f'Фильм {number}', year=2000)
+            for number in range(3)
+        ]
+        self.spammer = User.objects.create(username='spam', email='s@ya.ru')
+        self.user = User.objects.create(username='user', email='u@ya.ru')
+        self.review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Отзыв', score=8
+        )
+
+    def spam(self, amount):
+        for title in self.titles[:amount]:
+            review = Review.objects.create(
+                title=title, author=self.spammer, text='Спам', score=1
+            )
+            Comment.objects.create(
+                review=review, author=self.user, text='Ответ'
+            )
+            Comment.objects.create(
+                review=self.review, author=self.spammer, text='Спам'
+            )
+
+    def aggregates(self, title):
+        title = Title.objects.get(pk=title.pk)
+        return (
+            title.rating_sum, title.reviews_count, title.rating,
+            TitleStats.objects.get(title=title).scores,
+        )
+
+    def test_user_deleted_with_reviews_and_comments(self):
+        self.spam(2)
+        version = Review.objects.get(pk=self.review.pk).version
+        deleted = []
+        bulk_deleted.connect(
+            lambda sender, pks, **kwargs: deleted.append((sender, pks)),
+            weak=False, dispatch_uid='test-fast-delete'
+        )
+        try:
+            self.assertEqual(
+                fast_delete(User.objects.filter(pk=self.spammer.pk)), 1
+            )
+        finally:
+            bulk_deleted.disconnect(dispatch_uid='test-fast-delete')
+        self.assertEqual(deleted, [(User, [self.spammer.pk])])
+        self.assertFalse(User.objects.filter(pk=self.spammer.pk).exists())
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertFalse(Comment.objects.exists())
+        rating_sum, reviews_count, rating, scores = self.aggregates(
+            self.titles[0]
+        )
+        self.assertEqual((rating_sum, reviews_count, rating), (8, 1, 8))
+        self.assertEqual((scores[1], scores[8]), (0, 1))
+        self.assertEqual(self.aggregates(self.titles[1])[:3], (0, 0, None))
+        self.assertGreater(
+            Review.objects.get(pk=self.review.pk).version, version
+        )
+
+    def test_queries_independent_of_reviews(self):
+        counts = []
+        for amount in (1, 3):
+            self.spam(amount)
+            with CaptureQueriesContext(connection) as context:
+                fast_delete(User.objects.filter(pk=self.spammer.pk))
+            counts.append(len(context.captured_queries))
+            self.spammer = User.objects.create(
+                username='spam', email='s@ya.ru'
+            )
+        self.assertEqual(counts[0], counts[1])
+
+    def test_title_deleted_with_dependants(self):
+        title = self.titles[0]
+        title.genre.add(self.genre)
+        Comment.objects.create(
+            review=self.review, author=self.user, text='Ответ'
+        )
+        self.assertEqual(fast_delete(Title.objects.filter(pk=title.pk)), 1)
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(TitleStats.objects.filter(title_id=title.pk).exists())
+        self.assertFalse(Title.genre.through.objects.exists())
+        self.assertEqual(Title.objects.count(), 2)
+
+    def test_nothing_to_delete(self):
+        self.assertEqual(fast_delete(User.objects.none()), 0)
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.export import CSV_TABLES
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+MODELS = (User, Category, Genre, Title, Title.genre.through, Review, Comment)
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        call_command(
+            'generate_data', users=15, categories=2, genres=4, titles=12,
+            reviews=60, comments=80, stdout=StringIO()
+        )
+        Title.objects.filter(pk=Title.objects.order_by('pk')[0].pk).update(
+            category=None
+        )
+
+    def snapshot(self):
+        return [
+            list(model.objects.order_by('pk').values_list(
+                *[model._meta.get_field(column).attname
+                  for column in CSV_TABLES[table][1]]
+            ))
+            for table, (model, _) in CSV_TABLES.items()
+        ] + [list(Title.objects.order_by('pk').values_list(
+            'rating_sum', 'reviews_count', 'rating'
+        ))]
+
+    def test_csv_reloads_with_import_csv(self):
+        expected = self.snapshot()
+        with tempfile.TemporaryDirectory() as path:
+            call_command(
+                'export_data', format='csv', path=path, chunk_size=7,
+                stdout=StringIO()
+            )
+            for model in reversed(MODELS):
+                model.objects.all().delete()
+            for table in CSV_TABLES:
+                call_command(
+                    'import_csv', path=os.path.join(path, f'{table}.csv'),
+                    bulk=True, stdout=StringIO()
+                )
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_ndjson_documents(self):
+        output = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command('export_data', chunk_size=5, stdout=output)
+        # Произведения, жанры и отзывы — по одному курсору.
+        self.assertEqual(len(context.captured_queries), 3)
+
+        documents = [
+            json.loads(line) for line in output.getvalue().splitlines()
+        ]
+        self.assertEqual(
+            [document['id'] for document in documents],
+            list(Title.objects.order_by('pk').values_list('pk', flat=True))
+        )
+        self.assertIsNone(documents[0]['category'])
+        for document in documents:
+            title = Title.objects.get(pk=document['id'])
+            self.assertEqual(document['rating'], title.rating)
+            self.assertEqual(
+                [genre['slug'] for genre in document['genre']],
+                list(title.genre.order_by('pk').values_list('slug', flat=True))
+            )
+            self.assertEqual(
+                [review['id'] for review in document['reviews']],
+                list(title.reviews.order_by('pub_date', 'id').values_list(
+                    'pk', flat=True
+                ))
+            )
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+from reviews.aggregates import rebuild_title_aggregates
+from reviews.generator import review_quotas
+from reviews.models import Comment, Review, Title, User
+
+
+class GenerateDataTest(TestCase):
+
+    def generate(self, **counts):
+        options = {
+            'users': 40, 'categories': 3, 'genres': 5, 'titles': 30,
+            'reviews': 400, 'comments': 600, 'batch_size': 100,
+            **counts,
+        }
+        call_command('generate_data', stdout=StringIO(), **options)
+
+    def test_counts_and_aggregates(self):
+        self.generate()
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Title.objects.count(), 30)
+        self.assertEqual(Review.objects.count(), 400)
+        self.assertEqual(Comment.objects.count(), 600)
+
+        stored = list(Title.objects.order_by('pk').values_list(
+            'rating_sum', 'reviews_count', 'rating'
+        ))
+        rebuild_title_aggregates()
+        self.assertEqual(stored, list(Title.objects.order_by('pk').values_list(
+            'rating_sum', 'reviews_count', 'rating'
+        )))
+
+    def test_reviews_are_skewed(self):
+        self.generate()
+        per_title = sorted(
+            Title.objects.values_list('reviews_count', flat=True),
+            reverse=True
+        )
+        self.assertEqual(per_title[0], 40)
+        self.assertLess(per_title[len(per_title) // 2], 40 // 2)
+        per_author = sorted(
+            Review.objects.order_by().values('author')
+            .annotate(total=Count('id'))
+            .values_list('total', flat=True),
+            reverse=True
+        )
+        self.assertGreater(per_author[0], 3 * per_author[-1])
+
+    def test_appends_to_existing_data(self):
+        self.generate()
+        self.generate(seed=1)
+        self.assertEqual(User.objects.count(), 80)
+        self.assertEqual(Review.objects.count(), 800)
+
+    def test_too_many_reviews(self):
+        with self.assertRaises(CommandError):
+            self.generate(users=2, titles=2, reviews=5, comments=0)
+
+    def test_quotas_respect_unique_reviews(self):
+        quotas = review_quotas(95, 10, 10, 1.1)
+        self.assertEqual(sum(quotas), 95)
+        self.assertLessEqual(max(quotas), 10)
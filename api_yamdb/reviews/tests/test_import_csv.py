@@ -0,0 +1,42 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from reviews.models import Review, Title, User
+
+
+class ImportCsvTest(TestCase):
+
+    def setUp(self):
+        # Имя одного пользователя совпадает с id другого.
+        self.named = User.objects.create(username='5', email='n@ya.ru')
+        self.other = User.objects.create(pk=5, username='other',
+                                         email='o@ya.ru')
+        self.title = Title.objects.create(name='Фильм', year=2000)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def load(self, header, **options):
+        path = os.path.join(self.directory.name, 'review.csv')
+        with open(path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write(f'title_id,text,score,{header}\n')
+            csv_file.write(f'{self.title.pk},Отзыв,7,5\n')
+        call_command('import_csv', path=path, stdout=StringIO(), **options)
+        return Review.objects.get().author
+
+    def test_column_decides_key(self):
+        for header, author in (
+            ('author', self.other),
+            ('author_id', self.other),
+            ('author__username', self.named),
+        ):
+            with self.subTest(header=header):
+                Review.objects.all().delete()
+                self.assertEqual(self.load(header, bulk=True), author)
+
+    def test_natural_keys_need_bulk(self):
+        with self.assertRaises(CommandError):
+            self.load('author__username')
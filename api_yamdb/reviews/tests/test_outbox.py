@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from reviews.models import OutgoingEmail, User
+from reviews.outbox import retry_delay, send_batch
+
+
+class OutboxTest(APITestCase):
+
+    def setUp(self):
+        self.mail_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mail_dir)
+        settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+            EMAIL_FILE_PATH=self.mail_dir,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def sent_files(self):
+        contents = []
+        for name in sorted(os.listdir(self.mail_dir)):
+            with open(os.path.join(self.mail_dir, name)) as f:
+                contents.append(f.read())
+        return contents
+
+    def send_emails(self, *args):
+        call_command('send_emails', '--once', *args, stdout=StringIO(),
+                     stderr=StringIO())
+
+    def signup(self, username):
+        return self.client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.ru'
+        })
+
+    def test_signup_queues_email(self):
+        response = self.signup('reader')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sent_files(), [])
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, 'reader@yamdb.ru')
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+
+        self.send_emails()
+        code = User.objects.get(username='reader').confirmation_code
+        [content] = self.sent_files()
+        self.assertIn('reader@yamdb.ru', content)
+        self.assertIn(code, content)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_batch_reuses_connection(self):
+        for username in ('first', 'second', 'third'):
+            self.signup(username)
+        with mock.patch(
+            'reviews.outbox.get_connection', wraps=get_connection
+        ) as connect:
+            self.send_emails('--batch-size', '10')
+        self.assertEqual(connect.call_count, 1)
+        # Файловый бэкенд пишет все письма соединения в один файл.
+        [content] = self.sent_files()
+        self.assertEqual(content.count('Subject:'), 3)
+
+    def test_failed_email_is_retried_with_backoff(self):
+        self.signup('reader')
+        with mock.patch(
+            'reviews.outbox.EmailMessage.send',
+            side_effect=SMTPException('timeout')
+        ):
+            self.send_emails('--max-attempts', '2')
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('timeout', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        # Время попытки ещё не наступило.
+        self.send_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch(
+            'reviews.outbox.EmailMessage.send',
+            side_effect=SMTPException('timeout')
+        ):
+            self.send_emails('--max-attempts', '2')
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    def test_connection_error_counts_as_attempt(self):
+        self.signup('reader')
+        stderr = StringIO()
+        with mock.patch(
+            'reviews.outbox.get_connection',
+            side_effect=SMTPException('refused')
+        ):
+            call_command('send_emails', '--once', stdout=StringIO(),
+                         stderr=stderr)
+        self.assertIn('refused', stderr.getvalue())
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('refused', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_claimed_emails_are_leased(self):
+        self.signup('reader')
+        claimed = []
+
+        def send(message):
+            # Другой воркер не получит письмо, пока идёт отправка.
+            claimed.append(send_batch())
+            return 1
+
+        with mock.patch(
+            'reviews.outbox.EmailMessage.send', autospec=True,
+            side_effect=send
+        ):
+            self.send_emails()
+        self.assertEqual(claimed, [(0, 0)])
+        self.assertEqual(
+            OutgoingEmail.objects.get().status, OutgoingEmail.SENT
+        )
+
+    def test_close_error_keeps_sent_status(self):
+        self.signup('reader')
+        with mock.patch(
+            'django.core.mail.backends.filebased.EmailBackend.close',
+            side_effect=SMTPException('quit failed')
+        ):
+            self.send_emails()
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self.assertEqual(email.attempts, 1)
+
+    def test_retry_delay_is_capped(self):
+        self.assertLess(retry_delay(1), retry_delay(2))
+        self.assertEqual(retry_delay(20), retry_delay(30))
@@ -0,0 +1,245 @@
+"""Бенчмарк эндпоинтов API на наполненной базе SQLite.
+
+Запросы выполняются в процессе через APIClient из DRF. Для каждого
+эндпоинта считаются p50/p95 времени ответа, число SQL-запросов на
+запрос и пик выделенной памяти (tracemalloc, отдельным запросом, чтобы
+не искажать время). Результат пишется в JSON; с --baseline он
+сравнивается с сохранённым прогоном, и при регрессии код выхода 1.
+
+benchmarks/baseline.json — прогон масштаба tiny. Время и память зависят
+от машины, поэтому с ним сравнивается только число запросов:
+
+    python benchmarks/run.py --scale tiny --db /tmp/bench.sqlite3 \\
+        --baseline benchmarks/baseline.json --queries-only
+
+Для сравнения времени запишите свой прогон на той же машине
+(--output) и передайте его в --baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_DIR), 'api_yamdb'))
+
+SCALES = {
+    'tiny': {'users': 50, 'titles': 100, 'reviews': 2000, 'comments': 4000},
+    'small': {
+        'users': 2000, 'titles': 1000, 'reviews': 50000, 'comments': 100000,
+    },
+    'large': {
+        'users': 50000, 'titles': 100000, 'reviews': 5000000,
+        'comments': 10000000,
+    },
+}
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def endpoints():
+    """Имена и URL эндпоинтов.
+
+    Отзывы и комментарии берутся у самого популярного произведения и
+    самого обсуждаемого отзыва: там и появляются проблемы.
+    """
+    from django.db.models import Count
+    from reviews.models import Genre, Review, Title
+
+    titles = Title.objects.count()
+    title = Title.objects.order_by('-reviews_count', 'pk').first()
+    genre = Genre.objects.order_by('pk')[0]
+    urls = {
+        'titles': '/api/v1/titles/',
+        'titles_deep_page': f'/api/v1/titles/?page={max(1, titles // 10)}',
+        'titles_filter': f'/api/v1/titles/?genre={genre.slug}',
+        'titles_search': '/api/v1/titles/?search=море',
+        'title': f'/api/v1/titles/{title.pk}/',
+        'categories': '/api/v1/categories/',
+        'genres': '/api/v1/genres/',
+    }
+    review = Review.objects.filter(title=title).annotate(
+        comments_total=Count('comments')
+    ).order_by('-comments_total', 'pk').first()
+    if review is not None:
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        urls.update({
+            'reviews': reviews_url,
+            'reviews_last_page': (
+                f'{reviews_url}?page={max(1, -(-title.reviews_count // 10))}'
+            ),
+            'reviews_cursor': f'{reviews_url}?pagination=cursor',
+            'review': f'{reviews_url}{review.pk}/',
+            'comments': f'{reviews_url}{review.pk}/comments/',
+        })
+    return urls
+
+
+def measure(client, url, requests, warmup):
+    from django.db import connections
+
+    for _ in range(warmup):
+        client.get(url)
+    latencies = []
+    counter = QueryCounter()
+    with connections['default'].execute_wrapper(counter):
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: HTTP {response.status_code}')
+
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'url': url,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'queries': counter.count / requests,
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def compare(results, baseline, threshold, queries_only=False):
+    """Список регрессий относительно baseline.
+
+    p95 и память могут вырасти не более чем на долю threshold; число
+    запросов не зависит от машины и сравнивается строго.
+    """
+    if baseline['meta']['dataset'] != results['meta']['dataset']:
+        raise SystemExit(
+            f'baseline dataset {baseline["meta"]["dataset"]} differs from '
+            f'{results["meta"]["dataset"]}: rerun with the same scale'
+        )
+    metrics = () if queries_only else ('p95_ms', 'peak_kb')
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: queries {previous["queries"]} '
+                f'-> {current["queries"]}'
+            )
+        for metric in metrics:
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {previous[metric]} '
+                    f'-> {current[metric]}'
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--db', default='/tmp/yamdb_bench.sqlite3',
+                        help='SQLite file; seeded on first run')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in ('users', 'titles', 'reviews', 'comments'):
+        parser.add_argument(f'--{name}', type=int,
+                            help=f'override {name} count of the scale')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', action='append',
+                        help='run only the named endpoint (repeatable)')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--baseline', help='results JSON to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed p95/memory growth, 0.2 = 20%%')
+    parser.add_argument('--queries-only', action='store_true',
+                        help='compare only SQL query counts with baseline '
+                        '(for a baseline recorded on another machine)')
+    return parser.parse_args()
+
+
+def setup_django(db):
+    os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+    os.environ['DB_NAME'] = db
+    os.environ['SERVER_TIMING_SAMPLE_RATE'] = '0'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def main():
+    args = parse_args()
+    setup_django(args.db)
+
+    from django import get_version
+    from rest_framework.test import APIClient
+    from seed import seed, seeded_counts
+
+    counts = {
+        name: getattr(args, name) or value
+        for name, value in SCALES[args.scale].items()
+    }
+    existing = seeded_counts()
+    if not any(existing.values()):
+        seed(counts, args.seed, log=lambda line: print(line, file=sys.stderr))
+    elif existing != counts:
+        print(f'{args.db} already holds {existing}; '
+              'benchmarking it as is', file=sys.stderr)
+    counts = seeded_counts()
+
+    client = APIClient()
+    results = {
+        'meta': {
+            'dataset': counts,
+            'requests': args.requests,
+            'python': platform.python_version(),
+            'django': get_version(),
+        },
+        'endpoints': {},
+    }
+    for name, url in endpoints().items():
+        if args.only and name not in args.only:
+            continue
+        result = measure(client, url, args.requests, args.warmup)
+        results['endpoints'][name] = result
+        print(f'{name:18} p50 {result["p50_ms"]:8.2f} ms  '
+              f'p95 {result["p95_ms"]:8.2f} ms  '
+              f'{result["queries"]:5.1f} queries  '
+              f'{result["peak_kb"]:7} KiB')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(
+                results, json.load(f), args.threshold, args.queries_only
+            )
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Наполнение базы для бенчмарков генератором generate_data.
+
+Данные детерминированы: один и тот же масштаб и seed дают одинаковые
+строки, поэтому результаты разных прогонов можно сравнивать.
+"""
+from reviews.generator import Generator
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+MODELS = {
+    'users': User,
+    'titles': Title,
+    'reviews': Review,
+    'comments': Comment,
+}
+CATEGORIES = 10
+GENRES = 30
+
+
+def seeded_counts():
+    return {name: model.objects.count() for name, model in MODELS.items()}
+
+
+def seed(counts, random_seed=0, log=print):
+    Generator(
+        {
+            Category: CATEGORIES,
+            Genre: GENRES,
+            **{model: counts[name] for name, model in MODELS.items()},
+        },
+        seed=random_seed,
+        log=log,
+    ).generate()
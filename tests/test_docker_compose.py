@@ -1,6 +1,8 @@
 import os
 import re
 
+import pytest
+
 from .conftest import infra_dir_path, root_dir
 
 
@@ -27,3 +29,11 @@ class TestDockerfileCompose:
         assert re.search(r'image:\s+([a-zA-Z0-9]+)\/([a-zA-Z0-9_\.])+(\:[a-zA-Z0-9_-]+)?', docker_compose), (
             'Проверьте, что добавили сборку контейнера из образа на вашем DockerHub в файл docker-compose.yaml'
         )
+
+    def test_docker_compose_parses(self):
+        yaml = pytest.importorskip('yaml')
+        with open(os.path.join(infra_dir_path, 'docker-compose.yaml')) as f:
+            docker_compose = yaml.safe_load(f)
+        assert {'db', 'web', 'nginx'} <= set(docker_compose['services']), (
+            'Проверьте отступы сервисов в файле docker-compose.yaml'
+        )